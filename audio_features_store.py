@@ -0,0 +1,146 @@
+"""Persistent store of Spotify track audio features."""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+# Numeric audio features kept per track, in column order
+FEATURE_COLUMNS = [
+    'danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness',
+    'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo',
+    'duration_ms', 'time_signature',
+]
+
+# Spotify API limit for the several-tracks audio features endpoint
+AUDIO_FEATURES_BATCH_SIZE = 100
+
+# SQLite limit on host parameters in one statement is 999 on older builds
+_QUERY_CHUNK_SIZE = 900
+
+
+class AudioFeaturesStore:
+    """On-disk cache of audio features keyed by track ID.
+
+    Audio features never change for a track, so entries never expire.
+    Tracks Spotify has no features for are remembered as unavailable, so
+    they are not requested again either.
+    """
+
+    def __init__(self, path: Path):
+        """Open (or create) the store database."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ', '.join(f"{column} REAL" for column in FEATURE_COLUMNS)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS audio_features ("
+            f" track_id TEXT PRIMARY KEY,"
+            f" available INTEGER NOT NULL,"
+            f" {columns})"
+        )
+
+    def _select(self, track_ids: List[str]) -> Dict[str, Tuple]:
+        """Fetch stored rows (track_id, available, *features) for the given IDs."""
+        rows = {}
+        unique_ids = list(dict.fromkeys(track_ids))
+        with self._lock:
+            for start in range(0, len(unique_ids), _QUERY_CHUNK_SIZE):
+                chunk = unique_ids[start:start + _QUERY_CHUNK_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+                for row in self._conn.execute(
+                    f"SELECT track_id, available, {', '.join(FEATURE_COLUMNS)}"
+                    f" FROM audio_features WHERE track_id IN ({placeholders})",
+                    chunk
+                ):
+                    rows[row[0]] = row
+        return rows
+
+    def missing(self, track_ids: List[str]) -> List[str]:
+        """Get the IDs (in order, without duplicates) that have never been fetched."""
+        stored = self._select(track_ids)
+        return [track_id for track_id in dict.fromkeys(track_ids) if track_id not in stored]
+
+    def missing_batches(self, track_ids: List[str]) -> List[List[str]]:
+        """Split the never-fetched IDs into audio-features requests of at most 100 tracks."""
+        missing = self.missing(track_ids)
+        return [missing[i:i + AUDIO_FEATURES_BATCH_SIZE] for i in range(0, len(missing), AUDIO_FEATURES_BATCH_SIZE)]
+
+    def put_batches(self, batches: List[List[str]], results: List[Optional[List[Optional[Dict[str, Any]]]]]) -> None:
+        """Store the responses to missing_batches() requests, one result list per batch.
+
+        Spotify returns None for tracks it has no features for (and may
+        return nothing for a whole batch); those tracks are stored as
+        unavailable.
+        """
+        for batch, batch_features in zip(batches, results):
+            batch_features = batch_features or [None] * len(batch)
+            self.put_many(
+                [f for f in batch_features if f is not None],
+                unavailable=[track_id for track_id, f in zip(batch, batch_features) if f is None]
+            )
+
+    def get_many(self, track_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get stored features as Spotify-style dicts, skipping unavailable tracks."""
+        return {
+            track_id: {'id': track_id, **dict(zip(FEATURE_COLUMNS, row[2:]))}
+            for track_id, row in self._select(track_ids).items()
+            if row[1]
+        }
+
+    def put_many(self, features: Iterable[Dict[str, Any]], unavailable: Iterable[str] = ()) -> None:
+        """Store fetched features, and mark tracks Spotify had none for."""
+        rows = [
+            (feature['id'], 1, *(feature.get(column) for column in FEATURE_COLUMNS))
+            for feature in features
+        ]
+        rows.extend((track_id, 0, *([None] * len(FEATURE_COLUMNS))) for track_id in unavailable)
+        if not rows:
+            return
+
+        placeholders = ', '.join('?' * (len(FEATURE_COLUMNS) + 2))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO audio_features (track_id, available, {', '.join(FEATURE_COLUMNS)})"
+                f" VALUES ({placeholders})",
+                rows
+            )
+            self._conn.execute("COMMIT")
+        logger.debug(f"Stored audio features for {len(rows)} tracks")
+
+    def as_array(self, track_ids: List[str], columns: List[str] = None) -> Tuple[List[str], np.ndarray]:
+        """Get features as one contiguous float64 matrix.
+
+        Args:
+            track_ids: Tracks to include; those without features are left out
+            columns: Feature columns to include (default: all FEATURE_COLUMNS)
+
+        Returns:
+            (ids, matrix): the IDs of the included tracks and an
+            (len(ids), len(columns)) array with one row per ID
+        """
+        columns = columns or FEATURE_COLUMNS
+        indexes = [FEATURE_COLUMNS.index(column) + 2 for column in columns]
+
+        rows = self._select(track_ids)
+        ids = [track_id for track_id in dict.fromkeys(track_ids) if track_id in rows and rows[track_id][1]]
+
+        matrix = np.empty((len(ids), len(columns)), dtype=np.float64)
+        for i, track_id in enumerate(ids):
+            row = rows[track_id]
+            matrix[i] = [np.nan if row[index] is None else row[index] for index in indexes]
+
+        return ids, np.ascontiguousarray(matrix)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -1,7 +1,8 @@
 """Abstract base classes for music service integrations."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable, Hashable, AsyncIterator
 from dataclasses import dataclass
 from enum import Enum
 
@@ -26,10 +27,13 @@ class TrackInfo:
     explicit: bool = False
     popularity: Optional[int] = None
     genres: List[str] = None
+    artist_refs: List[Dict[str, str]] = None  # [{'id': ..., 'name': ...}] per credited artist
     
     def __post_init__(self):
         if self.genres is None:
             self.genres = []
+        if self.artist_refs is None:
+            self.artist_refs = []
 
 
 @dataclass
@@ -64,6 +68,36 @@ class BaseMusicService(ABC):
         """Initialize the music service with configuration."""
         self.config = config
         self.authenticated = False
+        
+        # Requests currently in flight, for single-flight coalescing
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced_requests = 0
+    
+    async def _single_flight(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Share one in-flight request between concurrent identical callers.
+        
+        The first caller for `key` starts `factory()`; callers arriving while
+        it is still running await the same future instead of sending a
+        duplicate request. The entry is dropped once the request finishes,
+        so this never serves stale results (caching is a separate concern).
+        
+        Args:
+            key: Identity of the request, e.g. endpoint plus arguments
+            factory: Zero-argument coroutine function performing the request
+            
+        Returns:
+            The shared result; exceptions propagate to every caller
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced_requests += 1
+        
+        # Shielded so one caller being cancelled does not cancel the others
+        return await asyncio.shield(future)
     
     @abstractmethod
     async def authenticate(self) -> bool:
@@ -91,6 +125,21 @@ class BaseMusicService(ABC):
         """
         pass
     
+    async def iter_playlist_tracks(self, playlist_id: str) -> AsyncIterator[List[TrackInfo]]:
+        """Yield the tracks of a playlist page by page as they arrive.
+        
+        Lets callers start processing before the whole playlist has been
+        downloaded. Services that page through playlists should override
+        this; the default yields get_playlist_tracks() as a single page.
+        
+        Args:
+            playlist_id: The playlist identifier
+            
+        Yields:
+            Lists of TrackInfo objects, in playlist order
+        """
+        yield await self.get_playlist_tracks(playlist_id)
+    
     @abstractmethod
     async def create_playlist(self, name: str, description: str = "", public: bool = True) -> PlaylistInfo:
         """Create a new playlist.
@@ -155,6 +204,20 @@ class BaseMusicService(ABC):
         """
         pass
     
+    async def get_artists_info(self, artist_ids: List[str]) -> List[ArtistInfo]:
+        """Get detailed information for several artists.
+        
+        Services with a batch endpoint should override this; the default
+        falls back to one get_artist_info call per artist.
+        
+        Args:
+            artist_ids: The artist identifiers
+            
+        Returns:
+            List of ArtistInfo objects for the artists that could be found
+        """
+        return [await self.get_artist_info(artist_id) for artist_id in artist_ids]
+    
     @abstractmethod
     async def get_related_artists(self, artist_id: str) -> List[ArtistInfo]:
         """Get artists related to the given artist.
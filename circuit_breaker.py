@@ -0,0 +1,92 @@
+"""Circuit breakers that stop calling endpoints which keep failing."""
+
+import time
+from typing import Dict, Any, Optional
+
+from loguru import logger
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        super().__init__(f"Circuit open for '{endpoint}', skipping request")
+
+
+class CircuitBreaker:
+    """Trips after consecutive failures and then rejects calls immediately.
+
+    With no reset timeout the circuit stays open for the rest of the run.
+    Otherwise a single trial call is let through once the timeout passes
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, endpoint: str, failure_threshold: int = 3, reset_timeout: Optional[float] = None):
+        """Initialize a closed circuit.
+
+        Args:
+            endpoint: Name used in log messages
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds before a trial call is allowed, or None for never
+        """
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected."""
+        if self.opened_at is None:
+            return False
+        if self.reset_timeout is not None and time.monotonic() - self.opened_at >= self.reset_timeout:
+            return False
+        return True
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if the endpoint should not be called."""
+        if self.is_open:
+            self.rejected += 1
+            raise CircuitOpenError(self.endpoint)
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold."""
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    f"Circuit opened for '{self.endpoint}' after {self.failures} consecutive failures"
+                )
+            self.opened_at = time.monotonic()
+
+
+class CircuitBreakerRegistry:
+    """One circuit breaker per endpoint, created on first use."""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: Optional[float] = None):
+        """Initialize the registry with settings shared by every breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        """Get or create the breaker for an endpoint."""
+        if endpoint not in self._breakers:
+            self._breakers[endpoint] = CircuitBreaker(endpoint, self.failure_threshold, self.reset_timeout)
+        return self._breakers[endpoint]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the breakers that have seen failures."""
+        return {
+            endpoint: {'open': breaker.is_open, 'failures': breaker.failures, 'rejected': breaker.rejected}
+            for endpoint, breaker in self._breakers.items()
+            if breaker.failures or breaker.rejected
+        }
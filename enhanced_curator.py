@@ -1,8 +1,7 @@
 """Enhanced playlist curator with history tracking to minimize repetition."""
 
-import json
 import random
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any
 
@@ -10,6 +9,7 @@ from loguru import logger
 
 from config import get_settings
 from spotify_client import SpotifyClient
+from usage_event_log import EnhancedUsageEventLog, usage_event, epoch_now, SECONDS_PER_DAY
 
 
 class EnhancedCurator:
@@ -20,11 +20,13 @@ class EnhancedCurator:
         self.settings = get_settings()
         self.spotify_client = SpotifyClient(self.settings)
         self.history_file = Path("playlist_history.json")
+        self.history_log = EnhancedUsageEventLog(self.history_file)
     
     def generate_workout_playlist(self) -> Dict[str, Any]:
         """Generate a workout playlist with maximum variety and minimal repetition."""
         try:
             logger.info("Generating workout playlist with enhanced variety algorithms")
+            now = epoch_now()  # One clock reading for every recency calculation of this run
             
             # Get reference playlist tracks
             reference_tracks = self.spotify_client.get_playlist_tracks(self.settings.reference_playlist_id)
@@ -37,17 +39,16 @@ class EnhancedCurator:
             usage_history = self._load_usage_history()
             
             # Smart selection with variety optimization
-            selected_tracks = self._smart_select_with_history(reference_tracks, usage_history)
+            selected_tracks = self._smart_select_with_history(reference_tracks, usage_history, now)
+            
+            today = datetime.fromtimestamp(now)
+            playlist_name = f"{self.settings.target_playlist_name} - {today.strftime('%Y-%m-%d')}"
             
             # Update usage history
-            self._update_usage_history(selected_tracks, usage_history)
+            self._update_usage_history(selected_tracks, usage_history, playlist_name, now)
             
             logger.info(f"Selected {len(selected_tracks)} tracks with optimized variety")
             
-            # Create playlist
-            today = datetime.now()
-            playlist_name = f"{self.settings.target_playlist_name} - {today.strftime('%Y-%m-%d')}"
-            
             # Check if playlist exists
             existing_id = self.spotify_client.find_playlist_by_name(playlist_name)
             if existing_id:
@@ -79,7 +80,7 @@ class EnhancedCurator:
                 'main_playlist_id': main_playlist_id,
                 'track_count': len(selected_tracks),
                 'tracks': selected_tracks,
-                'created_at': datetime.now().isoformat(),
+                'created_at': today.isoformat(),
                 'spotify_url': f"https://open.spotify.com/playlist/{playlist_id}",
                 'main_spotify_url': f"https://open.spotify.com/playlist/{main_playlist_id}",
                 'curation_method': 'Enhanced variety with history tracking',
@@ -93,14 +94,14 @@ class EnhancedCurator:
             logger.error(f"Failed to generate playlist: {e}")
             raise
     
-    def _smart_select_with_history(self, reference_tracks: List[Dict[str, Any]], usage_history: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _smart_select_with_history(self, reference_tracks: List[Dict[str, Any]], usage_history: Dict[str, Any], now: int = None) -> List[Dict[str, Any]]:
         """Smart selection with history tracking to maximize variety."""
         
         target_size = min(self.settings.playlist_size, len(reference_tracks))
         
         # Score tracks based on usage recency and frequency
         track_scores = {}
-        current_time = datetime.now()
+        now = now or epoch_now()
         
         for track in reference_tracks:
             track_id = track['id']
@@ -117,8 +118,7 @@ class EnhancedCurator:
                 
                 # Boost score based on time since last use (older = higher score)
                 if track_history['last_used']:
-                    last_used = datetime.fromisoformat(track_history['last_used'])
-                    days_since = (current_time - last_used).days
+                    days_since = (now - track_history['last_used']) // SECONDS_PER_DAY
                     
                     # Boost tracks not used in the last 7 days
                     if days_since >= 7:
@@ -165,58 +165,33 @@ class EnhancedCurator:
         return selected_tracks[:target_size]
     
     def _load_usage_history(self) -> Dict[str, Any]:
-        """Load track usage history from file."""
-        if self.history_file.exists():
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to load history file: {e}")
+        """Load track usage history from the snapshot and event log."""
+        try:
+            return self.history_log.load()
+        except Exception as e:
+            logger.warning(f"Failed to load history file: {e}")
         
         # Return default history structure
-        return {
-            'tracks': {},  # track_id -> {count, last_used, first_used}
-            'playlists': [],  # list of playlist creation dates
-            'created_at': datetime.now().isoformat()
-        }
+        return self.history_log.empty()
     
-    def _update_usage_history(self, selected_tracks: List[Dict[str, Any]], usage_history: Dict[str, Any]) -> None:
+    def _update_usage_history(self, selected_tracks: List[Dict[str, Any]], usage_history: Dict[str, Any], playlist: str = None, now: int = None) -> None:
         """Update track usage history."""
-        current_time = datetime.now().isoformat()
+        current_time = now or epoch_now()
         
-        # Update track usage
-        for track in selected_tracks:
-            track_id = track['id']
-            if track_id not in usage_history['tracks']:
-                usage_history['tracks'][track_id] = {
-                    'count': 0,
-                    'last_used': None,
-                    'first_used': current_time,
-                    'name': track['name'],
-                    'artists': track['artists']
-                }
-            
-            usage_history['tracks'][track_id]['count'] += 1
-            usage_history['tracks'][track_id]['last_used'] = current_time
-        
-        # Record playlist creation
-        usage_history['playlists'].append({
-            'date': current_time,
-            'track_count': len(selected_tracks),
-            'track_ids': [t['id'] for t in selected_tracks]
-        })
+        # Record track usage and the playlist creation, one event per track
+        events = [
+            usage_event('spotify', playlist, current_time, track['id'], name=track['name'], artists=track['artists'])
+            for track in selected_tracks
+        ]
+        for event in events:
+            self.history_log.apply(usage_history, event)
         
         # Clean old history (keep last 90 days)
-        cutoff_date = datetime.now() - timedelta(days=90)
-        usage_history['playlists'] = [
-            p for p in usage_history['playlists']
-            if datetime.fromisoformat(p['date']) > cutoff_date
-        ]
+        self.history_log.prune(usage_history, current_time)
         
-        # Save updated history
+        # Append to the event log instead of rewriting the file
         try:
-            with open(self.history_file, 'w') as f:
-                json.dump(usage_history, f, indent=2)
+            self.history_log.append(events)
         except Exception as e:
             logger.warning(f"Failed to save history file: {e}")
     
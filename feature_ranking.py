@@ -0,0 +1,83 @@
+"""Vectorized ranking of tracks by audio-feature distance to workout targets."""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Audio features candidates are ranked on, in matrix column order
+RANKING_FEATURES = ['energy', 'danceability', 'valence', 'tempo']
+
+# Divisors that bring every feature onto a comparable 0..1 range
+# (tempo is bounded to 50-200 BPM in Settings)
+FEATURE_SCALES = {
+    'energy': 1.0,
+    'danceability': 1.0,
+    'valence': 1.0,
+    'tempo': 150.0,
+}
+
+
+class FeatureRanker:
+    """Scores candidate tracks by weighted distance to target audio features.
+
+    Feature vectors are scaled and weighted into a space where plain
+    Euclidean distance equals the weighted distance, with the targets at the
+    origin. Whole candidate pools are scored in one NumPy pass.
+    """
+
+    def __init__(self, targets: Dict[str, float], weights: Dict[str, float] = None):
+        """Initialize the ranker.
+
+        Args:
+            targets: Target value for each of RANKING_FEATURES
+            weights: Relative importance per feature (default: 1.0 each)
+        """
+        weights = weights or {}
+        self.features = RANKING_FEATURES
+        self.target = np.array([targets[feature] for feature in self.features], dtype=np.float64)
+        self.scale = np.array([FEATURE_SCALES[feature] for feature in self.features], dtype=np.float64)
+        self.weight = np.sqrt(np.array([weights.get(feature, 1.0) for feature in self.features], dtype=np.float64))
+
+    @classmethod
+    def from_settings(cls, settings, weights: Dict[str, float] = None) -> 'FeatureRanker':
+        """Create a ranker for the target_* fields of config.Settings."""
+        return cls(
+            targets={
+                'energy': settings.target_energy,
+                'danceability': settings.target_danceability,
+                'valence': settings.target_valence,
+                'tempo': settings.target_tempo,
+            },
+            weights=weights
+        )
+
+    def embed(self, matrix: np.ndarray) -> np.ndarray:
+        """Map an (n, len(RANKING_FEATURES)) feature matrix into ranking space."""
+        return (np.asarray(matrix, dtype=np.float64) - self.target) / self.scale * self.weight
+
+    def distances(self, matrix: np.ndarray) -> np.ndarray:
+        """Weighted distance of every row to the targets (inf where a feature is missing)."""
+        if len(matrix) == 0:
+            return np.empty(0, dtype=np.float64)
+        distances = np.sqrt(np.square(self.embed(matrix)).sum(axis=1))
+        distances[np.isnan(distances)] = np.inf
+        return distances
+
+    def rank(self, ids: List[str], matrix: np.ndarray, k: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Order tracks nearest-first.
+
+        Args:
+            ids: Track IDs, one per matrix row
+            matrix: Feature matrix with RANKING_FEATURES columns
+            k: Only return the k nearest (partial sort)
+
+        Returns:
+            (track_id, distance) pairs, nearest first
+        """
+        distances = self.distances(matrix)
+        if k is not None and k < len(distances):
+            nearest = np.argpartition(distances, k)[:k]
+            order = nearest[np.argsort(distances[nearest], kind='stable')]
+        else:
+            order = np.argsort(distances, kind='stable')
+        return [(ids[i], float(distances[i])) for i in order]
@@ -401,6 +401,66 @@ def health(ctx: CLIContext):
     asyncio.run(check_health())
 
 
+def _history_event_logs() -> list:
+    """Event logs of the usage history files kept in the working directory."""
+    from usage_event_log import SpotifyUsageEventLog, YouTubeUsageEventLog, EnhancedUsageEventLog
+    
+    return [
+        SpotifyUsageEventLog(Path.cwd() / "spotify_usage_history.json"),
+        YouTubeUsageEventLog(Path.cwd() / "youtube_usage_history.json"),
+        EnhancedUsageEventLog(Path.cwd() / "playlist_history.json"),
+    ]
+
+
+@cli.command('compact-history')
+def compact_history():
+    """🗜️  Fold usage event logs into their history files."""
+    compacted = 0
+    for history_log in _history_event_logs():
+        if not history_log.log_path.exists():
+            continue
+        try:
+            history_log.compact()
+            click.echo(f"✅ Compacted {history_log.log_path.name} into {history_log.snapshot_path.name}")
+            compacted += 1
+        except Exception as e:
+            click.echo(f"❌ Failed to compact {history_log.log_path.name}: {e}")
+    
+    if not compacted:
+        click.echo("Nothing to compact")
+
+
+@cli.command('migrate-history')
+def migrate_history():
+    """🔁 Convert usage history files to integer epoch timestamps."""
+    from usage_history import SqliteUsageHistoryStore
+    
+    migrated = 0
+    for history_log in _history_event_logs():
+        if not (history_log.snapshot_path.exists() or history_log.log_path.exists()):
+            continue
+        try:
+            # Loading converts legacy ISO timestamps; compaction writes them back
+            history_log.compact()
+            click.echo(f"✅ Migrated {history_log.snapshot_path.name}")
+            migrated += 1
+        except Exception as e:
+            click.echo(f"❌ Failed to migrate {history_log.snapshot_path.name}: {e}")
+    
+    history_db = Path.cwd() / "spotify_usage_history.db"
+    if history_db.exists():
+        try:
+            # Opening the store upgrades its schema
+            SqliteUsageHistoryStore(history_db).close()
+            click.echo(f"✅ Migrated {history_db.name}")
+            migrated += 1
+        except Exception as e:
+            click.echo(f"❌ Failed to migrate {history_db.name}: {e}")
+    
+    if not migrated:
+        click.echo("No usage history files found")
+
+
 async def _interactive_service_selection(ctx: CLIContext, require_discovery: bool = False, require_curator: bool = False) -> MusicServiceType:
     """Interactive service selection with validation."""
     available_services = ctx.service_manager.get_available_services()
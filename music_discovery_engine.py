@@ -7,6 +7,7 @@ from typing import Dict, List, Any, Set
 from loguru import logger
 
 from config import get_settings
+from feature_ranking import FeatureRanker, RANKING_FEATURES
 from spotify_client import SpotifyClient
 
 
@@ -17,6 +18,7 @@ class MusicDiscoveryEngine:
         """Initialize the discovery engine."""
         self.settings = get_settings()
         self.spotify_client = SpotifyClient(self.settings)
+        self.ranker = FeatureRanker.from_settings(self.settings)
     
     def discover_new_playlist(self) -> Dict[str, Any]:
         """Discover a playlist of completely new tracks based on your taste."""
@@ -264,9 +266,22 @@ class MusicDiscoveryEngine:
         
         # If not enough in sweet spot, include others
         if len(filtered_tracks) < self.settings.playlist_size:
-            other_tracks = [track for track in tracks if track not in filtered_tracks]
+            filtered_ids = {track['id'] for track in filtered_tracks}
+            other_tracks = [track for track in tracks if track['id'] not in filtered_ids]
             filtered_tracks.extend(other_tracks)
         
+        # Prefer the tracks nearest the configured audio targets, ranked in one pass
+        try:
+            ids, matrix = self.spotify_client.get_audio_feature_matrix(
+                [track['id'] for track in filtered_tracks], RANKING_FEATURES
+            )
+            tracks_by_id = {track['id']: track for track in filtered_tracks}
+            nearest = self.ranker.rank(ids, matrix, k=self.settings.playlist_size * 2)
+            if len(nearest) >= self.settings.playlist_size:
+                filtered_tracks = [tracks_by_id[track_id] for track_id, distance in nearest]
+        except Exception as e:
+            logger.warning(f"Could not rank by audio features: {e}")
+        
         # Randomize and select
         random.shuffle(filtered_tracks)
         return filtered_tracks[:self.settings.playlist_size]
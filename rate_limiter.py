@@ -0,0 +1,121 @@
+"""Token-bucket rate limiting shared by music service API calls."""
+
+import asyncio
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from loguru import logger
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations in arrival order.
+
+    Tokens are allowed to go negative: every caller immediately reserves a
+    slot and is told how long to wait for it, so waiting callers form a
+    queue instead of retrying or failing.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """Initialize a bucket refilling at `rate` tokens per second."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, now: float) -> float:
+        """Take one token and return the number of seconds to wait for it."""
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = max(self.updated_at, now)
+        self.tokens -= 1
+
+        # Refill only starts once a Retry-After block has passed
+        start = max(now, self.updated_at, self.blocked_until)
+        deficit = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return (start - now) + deficit
+
+    def block(self, now: float, delay: float) -> None:
+        """Stop handing out tokens for `delay` seconds."""
+        self.blocked_until = max(self.blocked_until, now + delay)
+        self.tokens = min(self.tokens, 0.0)
+        self.updated_at = max(self.updated_at, self.blocked_until)
+
+
+class RateLimiter:
+    """Per-endpoint token buckets behind a shared, service-wide bucket."""
+
+    def __init__(self, rate: float = 10.0, capacity: float = 10.0,
+                 endpoint_limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        """Initialize the limiter.
+
+        Args:
+            rate: Requests per second allowed across all endpoints
+            capacity: Burst size across all endpoints
+            endpoint_limits: Optional {endpoint: (rate, capacity)} overrides
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.endpoint_limits = endpoint_limits or {}
+        self._global = TokenBucket(rate, capacity)
+        self._buckets: Dict[str, TokenBucket] = {}
+
+        # Statistics
+        self.requests = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+
+    def _bucket(self, endpoint: str) -> TokenBucket:
+        """Get or create the bucket for an endpoint."""
+        if endpoint not in self._buckets:
+            rate, capacity = self.endpoint_limits.get(endpoint, (self.rate, self.capacity))
+            self._buckets[endpoint] = TokenBucket(rate, capacity)
+        return self._buckets[endpoint]
+
+    async def acquire(self, endpoint: str) -> float:
+        """Wait for permission to call an endpoint.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        now = time.monotonic()
+        wait = max(self._global.reserve(now), self._bucket(endpoint).reserve(now))
+        self.requests += 1
+
+        if wait > 0:
+            self.total_wait += wait
+            await asyncio.sleep(wait)
+
+        return wait
+
+    def penalize(self, endpoint: str, retry_after: float) -> None:
+        """Honour a Retry-After response from the API.
+
+        Rate limits are applied per application, so the pause applies to
+        every endpoint, not only the one that was throttled.
+        """
+        self.throttled += 1
+        logger.warning(f"Rate limited on '{endpoint}', pausing requests for {retry_after:.1f}s")
+        self._global.block(time.monotonic(), retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get limiter statistics."""
+        return {
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'total_wait_seconds': round(self.total_wait, 3)
+        }
+
+
+# Process-wide limiters, one per service
+_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(service: str, **kwargs) -> RateLimiter:
+    """Get the shared rate limiter for a service, creating it on first use.
+
+    Keyword arguments are passed to RateLimiter only when it is created.
+    """
+    if service not in _limiters:
+        _limiters[service] = RateLimiter(**kwargs)
+    return _limiters[service]
@@ -0,0 +1,156 @@
+"""Persistent SQLite cache for slowly changing API responses."""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from loguru import logger
+
+# Marker for "use the endpoint's configured TTL"
+_ENDPOINT_TTL = object()
+
+
+class ResponseCache:
+    """On-disk cache of API responses keyed by endpoint and call arguments.
+
+    Each endpoint has its own time-to-live. When the cache grows past
+    `max_entries`, expired rows are dropped first and then the least recently
+    used ones.
+    """
+
+    # Run size-bounded eviction once every this many writes
+    EVICT_INTERVAL = 100
+
+    def __init__(self, path: Path, ttls: Optional[Dict[str, Optional[float]]] = None,
+                 default_ttl: float = 3600, max_entries: int = 20000):
+        """Open (or create) the cache database.
+
+        Args:
+            path: SQLite database file
+            ttls: Per-endpoint TTLs in seconds; None means the entry never expires
+            default_ttl: TTL for endpoints not listed in `ttls`
+            max_entries: Maximum number of cached responses to keep
+        """
+        self.path = Path(path)
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " endpoint TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (endpoint, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._evict()
+
+    @staticmethod
+    def make_key(*args, **kwargs) -> str:
+        """Build a stable cache key from call arguments."""
+        return json.dumps([args, kwargs], sort_keys=True, default=str)
+
+    def get(self, endpoint: str, key: str, default: Any = None) -> Any:
+        """Get a cached response, or `default` when missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE endpoint = ? AND key = ?",
+                (endpoint, key)
+            ).fetchone()
+
+            if row is None or (row[1] is not None and row[1] <= now):
+                self.misses[endpoint] += 1
+                return default
+
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE endpoint = ? AND key = ?",
+                (now, endpoint, key)
+            )
+
+        self.hits[endpoint] += 1
+        return json.loads(row[0])
+
+    def set(self, endpoint: str, key: str, value: Any, ttl: Any = _ENDPOINT_TTL) -> None:
+        """Store a response. `ttl` overrides the endpoint TTL when given."""
+        if ttl is _ENDPOINT_TTL:
+            ttl = self.ttls.get(endpoint, self.default_ttl)
+
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (endpoint, key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (endpoint, key, json.dumps(value), expires_at, now)
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_INTERVAL == 0:
+                self._evict()
+
+    def delete(self, endpoint: str, key: str) -> None:
+        """Remove a cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE endpoint = ? AND key = ?", (endpoint, key))
+
+    def clear(self, endpoint: Optional[str] = None) -> None:
+        """Remove all cached responses, or only those of one endpoint."""
+        with self._lock:
+            if endpoint:
+                self._conn.execute("DELETE FROM responses WHERE endpoint = ?", (endpoint,))
+            else:
+                self._conn.execute("DELETE FROM responses")
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        try:
+            self._conn.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            self._conn.execute(
+                "DELETE FROM responses WHERE rowid IN ("
+                " SELECT rowid FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache eviction failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters per endpoint and overall."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        total_hits = sum(self.hits.values())
+        total_misses = sum(self.misses.values())
+        lookups = total_hits + total_misses
+
+        return {
+            'entries': entries,
+            'hits': total_hits,
+            'misses': total_misses,
+            'hit_rate': round(total_hits / lookups, 3) if lookups else 0.0,
+            'by_endpoint': {
+                endpoint: {'hits': self.hits[endpoint], 'misses': self.misses[endpoint]}
+                for endpoint in set(self.hits) | set(self.misses)
+            }
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
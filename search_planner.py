@@ -0,0 +1,141 @@
+"""Planning and budgeting of track searches issued by discovery strategies."""
+
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Tuple, Callable, Awaitable
+
+from loguru import logger
+
+from base_music_service import TrackInfo
+
+# Spotify API maximum page size for track searches
+MAX_SEARCH_LIMIT = 50
+
+# field:"single-word" is equivalent to field:single-word
+_QUOTED_SINGLE_WORD = re.compile(r'(\w+):"([^"\s]+)"')
+
+# Search operators are only recognized in upper case
+_OPERATORS = {'OR', 'AND', 'NOT'}
+
+
+@dataclass
+class PlannedSearch:
+    """One unique search request and the strategies that asked for it."""
+    key: str  # Canonical form, used only to detect duplicates
+    query: str  # Query as first requested; this is what gets sent
+    requests: List[Tuple[str, int]] = field(default_factory=list)  # (strategy, limit) in request order
+    rank: int = 0  # Position of the query within the first strategy that asked for it
+
+    @property
+    def limit(self) -> int:
+        """Combined limit of every request, capped at the API maximum."""
+        return min(MAX_SEARCH_LIMIT, sum(limit for _, limit in self.requests))
+
+
+class SearchPlanner:
+    """Collects the searches of every discovery strategy before running any.
+
+    Queries are canonicalized so trivially different spellings of the same
+    search collapse into one request, whose limit is the sum of what each
+    strategy asked for. The first spelling requested is the one sent.
+    Each strategy then receives its own slice of the results. If the plan
+    exceeds the request budget, searches are kept round-robin across
+    strategies (in strategy order) so every strategy keeps its
+    highest-priority queries.
+    """
+
+    def __init__(self, budget: int):
+        """Initialize an empty plan allowing at most `budget` searches."""
+        self.budget = budget
+        self._searches: Dict[str, PlannedSearch] = {}
+        self._strategies: List[str] = []
+        self._strategy_counts: Dict[str, int] = {}
+        self._results: Dict[str, List[TrackInfo]] = {}
+
+        # Statistics
+        self.planned = 0
+        self.executed = 0
+        self.failed = 0
+
+    @staticmethod
+    def canonicalize(query: str) -> str:
+        """Normalize case, whitespace and redundant quoting of a search query.
+
+        The result is a dedupe key only; upper-case operators (OR, AND,
+        NOT) are kept so they stay distinct from the plain words.
+        """
+        words = [word if word in _OPERATORS else word.lower() for word in query.split()]
+        return _QUOTED_SINGLE_WORD.sub(r'\1:\2', ' '.join(words))
+
+    def add(self, strategy: str, query: str, limit: int) -> None:
+        """Register a search a strategy wants to run."""
+        if strategy not in self._strategy_counts:
+            self._strategies.append(strategy)
+            self._strategy_counts[strategy] = 0
+            self._results[strategy] = []
+
+        canonical = self.canonicalize(query)
+        search = self._searches.get(canonical)
+        if search is None:
+            search = PlannedSearch(canonical, ' '.join(query.split()), rank=self._strategy_counts[strategy])
+            self._searches[canonical] = search
+            self._strategy_counts[strategy] += 1
+
+        search.requests.append((strategy, max(1, limit)))
+        self.planned += 1
+
+    def _budgeted(self) -> List[PlannedSearch]:
+        """Select the searches to run, interleaving strategies by priority."""
+        strategy_order = {strategy: i for i, strategy in enumerate(self._strategies)}
+        ordered = sorted(
+            self._searches.values(),
+            key=lambda search: (search.rank, strategy_order[search.requests[0][0]])
+        )
+        return ordered[:self.budget]
+
+    async def execute(self, search: Callable[[str, int], Awaitable[List[TrackInfo]]],
+                      concurrent: bool = True) -> None:
+        """Run the plan and distribute the results to the strategies.
+
+        Args:
+            search: Search function taking (query, limit)
+            concurrent: Run the searches at once instead of one by one
+        """
+        selected = self._budgeted()
+
+        async def run(planned: PlannedSearch) -> List[TrackInfo]:
+            try:
+                return await search(planned.query, planned.limit)
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Search failed for '{planned.query}': {e}")
+                return []
+
+        if concurrent:
+            results = await asyncio.gather(*[run(planned) for planned in selected])
+        else:
+            results = [await run(planned) for planned in selected]
+        self.executed = len(selected)
+
+        # Hand each strategy its own slice of a merged request's results
+        for planned, tracks in zip(selected, results):
+            start = 0
+            for strategy, limit in planned.requests:
+                self._results[strategy].extend(tracks[start:start + limit])
+                start += limit
+
+    def results(self, strategy: str) -> List[TrackInfo]:
+        """Get the tracks found for a strategy's searches, in request order."""
+        return self._results.get(strategy, [])
+
+    def stats(self) -> Dict[str, Any]:
+        """Get planned versus executed search counts."""
+        return {
+            'planned': self.planned,
+            'unique': len(self._searches),
+            'executed': self.executed,
+            'over_budget': max(0, len(self._searches) - self.budget),
+            'failed': self.failed,
+            'saved': self.planned - self.executed
+        }
@@ -288,6 +288,18 @@ REFERENCE_PLAYLIST_ID=your_playlist_id_here
 # Optional: Playlist settings
 TARGET_PLAYLIST_NAME=Daily Workout Mix
 PLAYLIST_SIZE=30
+
+# Optional: Audio feature targets for discovery (0.0 to 1.0, BPM for tempo)
+TARGET_ENERGY=0.9
+TARGET_DANCEABILITY=0.4
+TARGET_VALENCE=0.5
+TARGET_TEMPO=160
+
+# Optional: Maximum number of Spotify requests in flight at once
+SPOTIFY_MAX_CONCURRENCY=8
+
+# Optional: Where curation usage history is kept (sqlite or json)
+USAGE_HISTORY_BACKEND=sqlite
 """
         elif service_type == MusicServiceType.YOUTUBE_MUSIC:
             template = """# YouTube Music Configuration
@@ -1,9 +1,8 @@
 """Spotify curator implementation."""
 
-import json
 import random
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Iterable
 from pathlib import Path
 from collections import Counter
 
@@ -11,6 +10,10 @@ from loguru import logger
 
 from base_music_service import BaseCurator, TrackInfo
 from services.spotify_service import SpotifyService
+from usage_history import UsageHistoryStore, create_usage_history_store
+from usage_event_log import epoch_now
+
+DEFAULT_USAGE_HISTORY_BACKEND = 'sqlite'
 
 
 class SpotifyCurator(BaseCurator):
@@ -21,34 +24,53 @@ class SpotifyCurator(BaseCurator):
         super().__init__(music_service)
         self.spotify = music_service
         self.history_file = Path.cwd() / "spotify_usage_history.json"
+        self._history_store: Optional[UsageHistoryStore] = None
+    
+    @property
+    def history_store(self) -> UsageHistoryStore:
+        """Usage history backend chosen by USAGE_HISTORY_BACKEND (opened lazily).
+        
+        The SQLite backend lives next to the JSON file and imports it the
+        first time it is opened.
+        """
+        if self._history_store is None:
+            backend = self.spotify.config.get('USAGE_HISTORY_BACKEND') or DEFAULT_USAGE_HISTORY_BACKEND
+            self._history_store = create_usage_history_store(backend, self.history_file.with_suffix(''))
+        return self._history_store
     
     async def generate_curated_playlist(self, reference_playlist_id: str, target_size: int = 30) -> Dict[str, Any]:
         """Generate a curated playlist from existing Spotify tracks."""
         try:
             logger.info("Generating curated Spotify playlist with enhanced variety algorithms")
+            now = epoch_now()  # One clock reading for every recency calculation of this run
             
-            # Get reference playlist tracks
-            reference_tracks = await self.spotify.get_playlist_tracks(reference_playlist_id)
+            # Stream reference playlist tracks, scoring usage while later pages download.
+            # Only the history of tracks actually seen is loaded.
+            usage_history = {}
+            reference_tracks = []
+            usage_scores = []
+            async for page in self.spotify.iter_playlist_tracks(reference_playlist_id):
+                reference_tracks.extend(page)
+                usage_history.update(self._load_usage_history(track.id for track in page))
+                usage_scores.extend(self._calculate_usage_score(track, usage_history, now) for track in page)
             logger.info(f"Reference playlist has {len(reference_tracks)} tracks")
             
             if not reference_tracks:
                 raise ValueError("Reference playlist is empty")
             
-            # Load usage history
-            usage_history = self._load_usage_history()
-            
             # Smart selection with variety optimization
-            selected_tracks = await self._smart_select_with_history(reference_tracks, usage_history, target_size, reference_playlist_id)
+            selected_tracks = await self._smart_select_with_history(
+                reference_tracks, usage_history, target_size, reference_playlist_id, usage_scores, now
+            )
+            
+            today = datetime.fromtimestamp(now)
+            playlist_name = f"Daily Workout Mix - {today.strftime('%Y-%m-%d')}"
             
             # Update usage history
-            self._update_usage_history(selected_tracks, usage_history)
+            self._update_usage_history(selected_tracks, usage_history, playlist_name, now)
             
             logger.info(f"Selected {len(selected_tracks)} tracks with optimized variety")
             
-            # Create playlist
-            today = datetime.now()
-            playlist_name = f"Daily Workout Mix - {today.strftime('%Y-%m-%d')}"
-            
             # Check if playlist exists
             existing_playlist = await self.spotify.find_playlist_by_name(playlist_name)
             if existing_playlist:
@@ -114,29 +136,35 @@ class SpotifyCurator(BaseCurator):
             'usage_distribution': self._get_usage_distribution(track_usage_counts)
         }
     
-    def _load_usage_history(self) -> Dict[str, Any]:
-        """Load usage history from file."""
+    def _load_usage_history(self, track_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Load usage history, optionally only for the given tracks."""
         try:
-            if self.history_file.exists():
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
+            return self.history_store.load(track_ids)
         except Exception as e:
             logger.warning(f"Could not load usage history: {e}")
         
         return {}
     
-    def _save_usage_history(self, history: Dict[str, Any]) -> None:
-        """Save usage history to file."""
+    def _save_usage_history(self, selected_tracks: List[TrackInfo], used_at: int, playlist: Optional[str] = None) -> None:
+        """Record one use of each selected track, at epoch second `used_at`, in the history backend."""
         try:
-            with open(self.history_file, 'w') as f:
-                json.dump(history, f, indent=2)
+            self.history_store.record_usage(selected_tracks, used_at, playlist)
         except Exception as e:
             logger.error(f"Could not save usage history: {e}")
     
-    async def _smart_select_with_history(self, reference_tracks: List[TrackInfo], usage_history: Dict[str, Any], target_size: int, reference_playlist_id: str = None) -> List[TrackInfo]:
-        """Select tracks with anti-repetition algorithm."""
+    async def _smart_select_with_history(self, reference_tracks: List[TrackInfo], usage_history: Dict[str, Any], target_size: int, reference_playlist_id: str = None, usage_scores: List[Optional[float]] = None, now: Optional[int] = None) -> List[TrackInfo]:
+        """Select tracks with anti-repetition algorithm.
+        
+        `usage_scores` may hold each reference track's _calculate_usage_score,
+        already computed while the playlist was streaming in. `now` is the
+        run's epoch time.
+        """
         # Score each track based on usage history and variety factors
         track_scores = []
+        now = now or epoch_now()
+        
+        if usage_scores is None:
+            usage_scores = [self._calculate_usage_score(track, usage_history, now) for track in reference_tracks]
         
         # Get artist distribution in reference playlist
         artist_counts = Counter()
@@ -146,8 +174,8 @@ class SpotifyCurator(BaseCurator):
             for artist in artists:
                 artist_counts[artist] += 1
         
-        for track in reference_tracks:
-            score = self._calculate_track_score(track, usage_history, artist_counts)
+        for track, usage_score in zip(reference_tracks, usage_scores):
+            score = self._calculate_track_score(track, usage_score, artist_counts)
             track_scores.append((track, score))
         
         # Sort by score (higher is better)
@@ -186,11 +214,7 @@ class SpotifyCurator(BaseCurator):
                     hours_since_last = float('inf')
                     
                     if track_usage.get('last_used'):
-                        try:
-                            last_used = datetime.fromisoformat(track_usage['last_used'])
-                            hours_since_last = (datetime.now() - last_used).total_seconds() / 3600
-                        except:
-                            pass
+                        hours_since_last = (now - track_usage['last_used']) / 3600
                     
                     # Only add if not used recently or not used much
                     usage_count = track_usage.get('count', 0)
@@ -228,6 +252,7 @@ class SpotifyCurator(BaseCurator):
                         fresh_tracks = []
                     
                     # Filter out any tracks we already have in usage history OR reference playlist
+                    usage_history.update(self._load_usage_history(track.id for track in fresh_tracks))
                     reference_track_names = {track.name.lower() for track in reference_tracks}
                     reference_track_ids = {track.id for track in reference_tracks}
                     
@@ -266,8 +291,18 @@ class SpotifyCurator(BaseCurator):
         logger.info(f"Selected {len(selected_tracks)} tracks with variety score optimization")
         return selected_tracks[:target_size]
     
-    def _calculate_track_score(self, track: TrackInfo, usage_history: Dict[str, Any], artist_counts: Counter) -> float:
-        """Calculate a score for track selection (higher = more likely to be selected)."""
+    def _calculate_usage_score(self, track: TrackInfo, usage_history: Dict[str, Any], now: Optional[int] = None) -> Optional[float]:
+        """Score a track on everything except artist variety.
+        
+        This part only needs the track itself, so it can be computed page by
+        page while the reference playlist is still loading.
+        
+        Args:
+            now: The run's epoch time (default: the current time)
+        
+        Returns:
+            Partial score, or None if the track was used too recently to select
+        """
         score = 100.0  # Base score
         
         # Factor 1: Usage frequency (less used = higher score)
@@ -289,26 +324,42 @@ class SpotifyCurator(BaseCurator):
         # Factor 2: Time since last use - MUCH stricter
         last_used = track_usage.get('last_used')
         if last_used:
-            try:
-                last_used_date = datetime.fromisoformat(last_used)
-                hours_since = (datetime.now() - last_used_date).total_seconds() / 3600
-                
-                if hours_since < 12:  # Used in last 12 hours
-                    return 0.1  # Effectively block this track
-                elif hours_since < 24:  # Used today
-                    score -= 80  # Massive penalty
-                elif hours_since < 72:  # Used in last 3 days
-                    score -= 50  # Heavy penalty
-                elif hours_since < 168:  # Used this week
-                    score -= 25  # Moderate penalty
-                else:  # Older than a week
-                    days_since = hours_since / 24
-                    score += min(days_since * 3, 50)  # Bonus for aging
-            except:
-                pass
+            hours_since = ((now or epoch_now()) - last_used) / 3600
+            
+            if hours_since < 12:  # Used in last 12 hours
+                return None  # Effectively block this track
+            elif hours_since < 24:  # Used today
+                score -= 80  # Massive penalty
+            elif hours_since < 72:  # Used in last 3 days
+                score -= 50  # Heavy penalty
+            elif hours_since < 168:  # Used this week
+                score -= 25  # Moderate penalty
+            else:  # Older than a week
+                days_since = hours_since / 24
+                score += min(days_since * 3, 50)  # Bonus for aging
         else:
             score += 30  # Bonus for tracks never used
         
+        # Factor 4: Track popularity (slight preference for popular tracks)
+        if track.popularity:
+            score += track.popularity * 0.1
+        
+        # Factor 5: Randomization factor to avoid deterministic selection
+        score += random.uniform(-3, 3)
+        
+        return score
+    
+    def _calculate_track_score(self, track: TrackInfo, usage_score: Optional[float], artist_counts: Counter) -> float:
+        """Calculate a score for track selection (higher = more likely to be selected).
+        
+        Adds the artist variety factor, which needs the whole reference
+        playlist, to the track's usage score.
+        """
+        if usage_score is None:
+            return 0.1  # Used too recently
+        
+        score = usage_score
+        
         # Factor 3: Artist variety (prefer less common artists in the reference playlist)
         track_artists = [artist.strip() for artist in track.artist.split(',')]
         for artist in track_artists:
@@ -320,18 +371,11 @@ class SpotifyCurator(BaseCurator):
             else:
                 score -= 5   # Penalty for very common artists
         
-        # Factor 4: Track popularity (slight preference for popular tracks)
-        if track.popularity:
-            score += track.popularity * 0.1
-        
-        # Factor 5: Randomization factor to avoid deterministic selection
-        score += random.uniform(-3, 3)
-        
         return max(score, 0.1)  # Ensure minimum score but allow very low ones
     
-    def _update_usage_history(self, selected_tracks: List[TrackInfo], usage_history: Dict[str, Any]) -> None:
+    def _update_usage_history(self, selected_tracks: List[TrackInfo], usage_history: Dict[str, Any], playlist: Optional[str] = None, now: Optional[int] = None) -> None:
         """Update usage history with newly selected tracks."""
-        current_time = datetime.now().isoformat()
+        current_time = now or epoch_now()
         
         for track in selected_tracks:
             if track.id not in usage_history:
@@ -345,8 +389,8 @@ class SpotifyCurator(BaseCurator):
             usage_history[track.id]['count'] += 1
             usage_history[track.id]['last_used'] = current_time
         
-        # Save updated history
-        self._save_usage_history(usage_history)
+        # Save only the selected tracks; the rest of the history is unchanged
+        self._save_usage_history(selected_tracks, current_time, playlist)
         logger.info(f"Updated usage history for {len(selected_tracks)} tracks")
     
     def _calculate_freshness_stats(self, selected_tracks: List[TrackInfo], usage_history: Dict[str, Any]) -> Dict[str, Any]:
@@ -1,14 +1,31 @@
 """Spotify discovery engine implementation."""
 
+import asyncio
 import random
+from dataclasses import asdict
 from datetime import datetime
-from typing import Dict, List, Any, Set
+from typing import Dict, List, Any, Set, Awaitable
 from collections import Counter
 
 from loguru import logger
 
 from base_music_service import BaseDiscoveryEngine, TrackInfo, ArtistInfo
-from services.spotify_service import SpotifyService
+from feature_ranking import FeatureRanker, RANKING_FEATURES
+from response_cache import ResponseCache
+from search_planner import SearchPlanner
+from services.spotify_service import SpotifyService, ARTIST_BATCH_SIZE
+
+# Maximum number of searches a single discovery run may send
+DEFAULT_SEARCH_BUDGET = 32
+
+# Default audio feature targets for workout music, overridden by
+# TARGET_ENERGY/TARGET_DANCEABILITY/TARGET_VALENCE/TARGET_TEMPO in spotify.env
+WORKOUT_TARGETS = {
+    'energy': 0.9,        # VERY high energy (aggressive)
+    'danceability': 0.4,  # Lower danceability (more rock/metal)
+    'valence': 0.5,       # Neutral/aggressive mood (not too happy)
+    'tempo': 160.0,       # Much higher target BPM (fast/aggressive)
+}
 
 
 class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
@@ -18,6 +35,33 @@ class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
         """Initialize with Spotify service."""
         super().__init__(music_service)
         self.spotify = music_service
+        # Run strategies and their inner API calls in parallel. The number of
+        # requests actually in flight is capped by the service's worker pool.
+        self.concurrent = True
+        self.search_budget = DEFAULT_SEARCH_BUDGET
+        # Sent to the recommendations API and used to rank every candidate
+        self.targets = self._configured_targets()
+        self.ranker = FeatureRanker(self.targets)
+    
+    def _configured_targets(self) -> Dict[str, float]:
+        """Audio feature targets from the service config, WORKOUT_TARGETS where unset or invalid."""
+        targets = dict(WORKOUT_TARGETS)
+        for feature in RANKING_FEATURES:
+            key = f'TARGET_{feature.upper()}'
+            value = self.spotify.config.get(key)
+            if value in (None, ''):
+                continue
+            try:
+                targets[feature] = float(value)
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring invalid {key}={value!r}, using {targets[feature]}")
+        return targets
+    
+    async def _gather(self, coroutines: List[Awaitable]) -> List[Any]:
+        """Await coroutines concurrently, or one after another in sequential mode."""
+        if not self.concurrent:
+            return [await coroutine for coroutine in coroutines]
+        return list(await asyncio.gather(*coroutines))
     
     async def discover_new_playlist(self, reference_playlist_id: str, target_size: int = 30) -> Dict[str, Any]:
         """Discover new tracks based on a Spotify reference playlist."""
@@ -39,8 +83,12 @@ class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
             if not filtered_tracks:
                 raise ValueError("No new tracks discovered. Try expanding your reference playlist or check back later.")
             
-            # Step 4: Select best tracks for playlist
-            selected_tracks = self._select_best_tracks(filtered_tracks, target_size)
+            # Step 4: Select best tracks for playlist, closest to the audio targets first
+            # (features are only fetched when there are more candidates than slots)
+            feature_distances = {}
+            if len(filtered_tracks) > target_size:
+                feature_distances = await self._feature_distances(filtered_tracks)
+            selected_tracks = self._select_best_tracks(filtered_tracks, target_size, feature_distances)
             
             # Step 5: Create discovery playlist
             result = await self._create_discovery_playlist(selected_tracks, taste_profile)
@@ -53,54 +101,122 @@ class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
             raise
     
     async def analyze_taste_profile(self, reference_playlist_id: str) -> Dict[str, Any]:
-        """Analyze user's taste profile from Spotify reference playlist."""
-        # Get reference playlist tracks
-        reference_tracks = await self.spotify.get_playlist_tracks(reference_playlist_id)
+        """Analyze user's taste profile from Spotify reference playlist.
+        
+        The artist, genre and track counts behind the profile are persisted
+        per playlist together with its snapshot_id. Each run applies only the
+        tracks added or removed since then, and only artists not seen before
+        are looked up, so the cost scales with the size of the change rather
+        than the size of the playlist.
+        """
+        snapshot_id = await self.spotify.get_playlist_snapshot_id(reference_playlist_id)
+        state_key = ResponseCache.make_key(reference_playlist_id)
+        state = self.spotify.response_cache.get('taste_profile', state_key) or {}
+        
+        artist_counts = Counter(state.get('artist_counts', {}))
+        artist_names = state.get('artist_names', {})
+        infos_by_id = {artist_id: ArtistInfo(**info) for artist_id, info in state.get('artist_infos', {}).items()}
+        genre_counts = Counter(state.get('genre_counts', {}))
+        unmatched_counts = Counter(state.get('track_counts', {}))  # Previous occurrences not yet seen again
+        previous_track_artists = state.get('track_artists', {})
+        
+        # Stream reference playlist tracks (from the snapshot cache when
+        # unchanged), counting only occurrences the stored profile lacks.
+        # Lookups for new artists start in full batches while later pages
+        # are still downloading.
+        reference_tracks = []
+        track_counts = Counter()
+        track_artists = {}
+        added = 0
+        pending_ids = []
+        requested_ids = set()
+        lookups = []
+        
+        try:
+            async for page in self.spotify.iter_playlist_tracks(reference_playlist_id, snapshot_id=snapshot_id):
+                reference_tracks.extend(page)
+                for track in page:
+                    track_counts[track.id] += 1
+                    track_artists[track.id] = [artist_ref['id'] for artist_ref in track.artist_refs]
+                    if unmatched_counts[track.id] > 0:
+                        unmatched_counts[track.id] -= 1  # Already counted in the stored profile
+                        continue
+                    
+                    added += 1
+                    for artist_ref in track.artist_refs:
+                        if artist_ref['id'] not in artist_counts and artist_ref['id'] not in infos_by_id:
+                            pending_ids.append(artist_ref['id'])
+                            requested_ids.add(artist_ref['id'])
+                        artist_counts[artist_ref['id']] += 1
+                        artist_names[artist_ref['id']] = artist_ref['name']
+                
+                if self.concurrent:
+                    while len(pending_ids) >= ARTIST_BATCH_SIZE:
+                        lookups.append(asyncio.ensure_future(self.spotify.get_artists_info(pending_ids[:ARTIST_BATCH_SIZE])))
+                        pending_ids = pending_ids[ARTIST_BATCH_SIZE:]
+        except BaseException:
+            for lookup in lookups:
+                lookup.cancel()
+            raise
+        
+        # Occurrences left unmatched were removed from the playlist
+        removed = 0
+        for track_id, count in unmatched_counts.items():
+            for _ in range(count):
+                removed += 1
+                for artist_id in previous_track_artists.get(track_id, []):
+                    artist_counts[artist_id] -= 1
+                    if artist_counts[artist_id] <= 0:
+                        del artist_counts[artist_id]
+                        artist_names.pop(artist_id, None)
+                        artist_info = infos_by_id.pop(artist_id, None)
+                        if artist_info:
+                            genre_counts.subtract(artist_info.genres)
+        
+        # Also retry artists whose lookup failed on an earlier run
+        pending_ids.extend(
+            artist_id for artist_id in artist_counts
+            if artist_id not in infos_by_id and artist_id not in requested_ids
+        )
+        if pending_ids:
+            lookups.append(self.spotify.get_artists_info(pending_ids))
         
         if not reference_tracks:
             raise ValueError("Reference playlist is empty or inaccessible")
         
         logger.info(f"Analyzing taste from {len(reference_tracks)} reference tracks")
         
-        # Extract unique artists
-        artists = []
-        for track in reference_tracks:
-            # Handle multiple artists (split by comma)
-            track_artists = [artist.strip() for artist in track.artist.split(',')]
-            artists.extend(track_artists)
-        
-        # Get detailed artist info and genres
-        unique_artists = list(set(artists))
-        artist_genres = []
-        artist_infos = []
+        for result in await self._gather([self._artist_lookup(lookup) for lookup in lookups]):
+            for artist_info in result:
+                if artist_info.id in artist_counts and artist_info.id not in infos_by_id:
+                    infos_by_id[artist_info.id] = artist_info
+                    genre_counts.update(artist_info.genres)
         
-        for artist_name in unique_artists[:50]:  # Limit to avoid rate limits
-            try:
-                # Search for artist to get ID
-                search_results = await self.spotify.search_tracks(f"artist:{artist_name}", limit=1)
-                if search_results:
-                    # Get the actual track to extract artist info
-                    track_data = self.spotify.client.track(search_results[0].id)
-                    if track_data and track_data['artists']:
-                        main_artist_id = track_data['artists'][0]['id']
-                        artist_info = await self.spotify.get_artist_info(main_artist_id)
-                        artist_infos.append(artist_info)
-                        artist_genres.extend(artist_info.genres)
-            except Exception as e:
-                logger.warning(f"Could not get artist info for {artist_name}: {e}")
-                continue
+        if state:
+            logger.info(f"Updated stored taste profile: {added} tracks added, {removed} removed")
         
-        # Count genres
-        genre_counts = Counter(artist_genres)
+        # Most frequent artists first
+        genre_counts = +genre_counts
+        unique_artists = list(dict.fromkeys(artist_names[artist_id] for artist_id, count in artist_counts.most_common()))
+        artist_infos = [infos_by_id[artist_id] for artist_id, count in artist_counts.most_common() if artist_id in infos_by_id]
         top_genres = [genre for genre, count in genre_counts.most_common(10)]
         
+        self.spotify.response_cache.set('taste_profile', state_key, {
+            'snapshot_id': snapshot_id,
+            'track_counts': dict(track_counts),
+            'track_artists': track_artists,
+            'artist_counts': dict(artist_counts),
+            'artist_names': artist_names,
+            'artist_infos': {artist_id: asdict(artist_info) for artist_id, artist_info in infos_by_id.items()},
+            'genre_counts': dict(genre_counts)
+        }, ttl=None)
+        
         # Get known track IDs (for filtering)
         known_track_ids = {track.id for track in reference_tracks}
         
-        # Also add user's saved tracks to known list
+        # Also add user's saved tracks to known list (the whole library, via the local mirror)
         try:
-            saved_tracks = await self.spotify.get_user_saved_tracks(limit=200)
-            known_track_ids.update(track.id for track in saved_tracks)
+            known_track_ids.update(await self.spotify.get_saved_track_ids())
         except Exception as e:
             logger.warning(f"Could not get saved tracks: {e}")
 
@@ -123,37 +239,44 @@ class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
         logger.info(f"Taste profile: {len(top_genres)} genres, {len(unique_artists)} artists")
         return taste_profile
     
+    async def _artist_lookup(self, lookup: Awaitable[List[ArtistInfo]]) -> List[ArtistInfo]:
+        """Await a batch of reference artist lookups, treating failure as no results."""
+        try:
+            return await lookup
+        except Exception as e:
+            logger.warning(f"Could not get artist info for reference artists: {e}")
+            return []
+    
     async def _discover_tracks(self, taste_profile: Dict[str, Any], target_count: int) -> List[TrackInfo]:
         """Discover new tracks using advanced Spotify discovery methods."""
-        discovered_tracks = []
-        
-        # Method 1: Spotify Recommendations API (MOST POWERFUL - millions of tracks)
-        recommendation_tracks = await self._get_spotify_recommendations(taste_profile, target_count)
-        discovered_tracks.extend(recommendation_tracks)
-        
-        # Method 2: Advanced genre + audio feature searches
-        feature_tracks = await self._search_by_audio_features(taste_profile, target_count // 2)
-        discovered_tracks.extend(feature_tracks)
-        
-        # Method 3: Genre-based search (expanded)
-        genre_tracks = await self._search_by_genres(taste_profile['genres'], target_count // 2)
-        discovered_tracks.extend(genre_tracks)
-        
-        # Method 4: Related artist exploration (expanded)
-        related_tracks = await self._find_related_artists_tracks(taste_profile['artist_infos'], target_count // 2)
-        discovered_tracks.extend(related_tracks)
-        
-        # Method 5: Similar track searches
-        similar_tracks = await self._search_similar_tracks(taste_profile, target_count // 3)
-        discovered_tracks.extend(similar_tracks)
-        
-        # Method 6: Workout-specific search (expanded)
-        workout_tracks = await self._search_workout_genres(taste_profile, target_count // 4)
-        discovered_tracks.extend(workout_tracks)
-        
-        # Method 7: Popularity tier searches (find hidden gems)
-        hidden_gems = await self._search_hidden_gems(taste_profile, target_count // 4)
-        discovered_tracks.extend(hidden_gems)
+        # Collect every strategy's searches first so they can be deduped,
+        # merged and budgeted as one plan instead of run independently
+        planner = SearchPlanner(budget=self.search_budget)
+        self._plan_audio_feature_searches(planner, taste_profile, target_count // 2)
+        self._plan_genre_searches(planner, taste_profile['genres'], target_count // 2)
+        self._plan_similar_track_searches(planner, taste_profile, target_count // 3)
+        self._plan_workout_searches(planner, taste_profile, target_count // 4)
+        self._plan_hidden_gem_searches(planner, taste_profile, target_count // 4)
+        
+        recommendations, related_tracks, _ = await self._gather([
+            # Method 1: Spotify Recommendations API (MOST POWERFUL - millions of tracks)
+            self._get_spotify_recommendations(taste_profile, target_count),
+            # Method 4: Related artist exploration (expanded)
+            self._find_related_artists_tracks(taste_profile['artist_infos'], target_count // 2),
+            # Methods 2, 3, 5, 6 and 7: the planned searches
+            planner.execute(self.spotify.search_tracks, concurrent=self.concurrent),
+        ])
+        
+        # Assemble in strategy order, so priority is unchanged
+        discovered_tracks = (
+            recommendations
+            + planner.results('audio_features')
+            + planner.results('genres')
+            + related_tracks
+            + planner.results('similar')
+            + planner.results('workout')
+            + planner.results('hidden_gems')
+        )
         
         # Remove duplicates while preserving order
         seen_ids = set()
@@ -164,53 +287,51 @@ class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
                 unique_tracks.append(track)
         
         logger.info(f"Discovered {len(unique_tracks)} unique tracks from {len(discovered_tracks)} total searches")
+        logger.info(f"Search plan: {planner.stats()}")
+        logger.debug(f"Spotify rate limiter: {self.spotify.rate_limiter.stats()}")
+        logger.debug(f"Spotify response cache: {self.spotify.response_cache.stats()}")
+        logger.debug(f"Spotify requests coalesced: {self.spotify.coalesced_requests}")
+        logger.debug(f"Spotify circuit breakers: {self.spotify.circuit_breakers.stats()}")
         return unique_tracks
     
-    async def _search_by_genres(self, genres: List[str], target_count: int) -> List[TrackInfo]:
-        """Search for tracks by genre."""
-        tracks = []
+    def _plan_genre_searches(self, planner: SearchPlanner, genres: List[str], target_count: int) -> None:
+        """Plan searches for tracks by genre."""
+        search_limit = max(1, target_count // max(1, len(genres[:5])))  # Ensure minimum 1
         
         for genre in genres[:5]:  # Use top 5 genres
-            try:
-                # Search with genre filter
-                query = f"genre:{genre}"
-                search_limit = max(1, target_count // max(1, len(genres[:5])))  # Ensure minimum 1
-                genre_tracks = await self.spotify.search_tracks(query, limit=search_limit)
-                tracks.extend(genre_tracks)
-                
-                logger.info(f"Found {len(genre_tracks)} tracks for genre: {genre}")
-            except Exception as e:
-                logger.warning(f"Genre search failed for {genre}: {e}")
-        
-        return tracks
+            planner.add('genres', f"genre:{genre}", search_limit)
     
     async def _find_related_artists_tracks(self, artist_infos: List[ArtistInfo], target_count: int) -> List[TrackInfo]:
         """Find tracks from artists related to user's favorites."""
-        tracks = []
+        async def related_artist_tracks(related_artist: ArtistInfo) -> List[TrackInfo]:
+            try:
+                return await self.spotify.get_artist_top_tracks(related_artist.id, limit=2)
+            except Exception as e:
+                logger.warning(f"Could not get tracks for related artist {related_artist.name}: {e}")
+                return []
         
-        for artist_info in artist_infos[:10]:  # Use top 10 artists
+        async def explore_artist(artist_info: ArtistInfo) -> List[TrackInfo]:
             try:
                 # Get related artists
                 related_artists = await self.spotify.get_related_artists(artist_info.id)
-                
-                # Get top tracks from related artists
-                for related_artist in related_artists[:3]:  # Top 3 related per artist
-                    try:
-                        artist_tracks = await self.spotify.get_artist_top_tracks(related_artist.id, limit=2)
-                        tracks.extend(artist_tracks)
-                    except Exception as e:
-                        logger.warning(f"Could not get tracks for related artist {related_artist.name}: {e}")
-                        
             except Exception as e:
                 logger.warning(f"Could not get related artists for {artist_info.name}: {e}")
+                return []
+            
+            # Get top tracks from related artists
+            results = await self._gather([
+                related_artist_tracks(related_artist) for related_artist in related_artists[:3]  # Top 3 related per artist
+            ])
+            return [track for artist_tracks in results for track in artist_tracks]
+        
+        results = await self._gather([explore_artist(artist_info) for artist_info in artist_infos[:10]])  # Use top 10 artists
+        tracks = [track for artist_tracks in results for track in artist_tracks]
         
         logger.info(f"Found {len(tracks)} tracks from related artists")
         return tracks
     
-    async def _search_workout_genres(self, taste_profile: Dict[str, Any], target_count: int) -> List[TrackInfo]:
-        """Search for workout music based on user's actual taste profile."""
-        tracks = []
-        
+    def _plan_workout_searches(self, planner: SearchPlanner, taste_profile: Dict[str, Any], target_count: int) -> None:
+        """Plan workout music searches based on user's actual taste profile."""
         # Use the ACTUAL genres from the user's playlist
         user_genres = taste_profile.get('genres', [])[:5]  # Top 5 genres
         
@@ -231,14 +352,7 @@ class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
         per_query = max(1, target_count // len(workout_searches))
         
         for query in workout_searches[:10]:  # Limit to 10 searches
-            try:
-                query_tracks = await self.spotify.search_tracks(query, limit=per_query)
-                tracks.extend(query_tracks)
-            except Exception as e:
-                logger.warning(f"Workout search failed for '{query}': {e}")
-        
-        logger.info(f"Found {len(tracks)} workout tracks based on user's genres: {user_genres}")
-        return tracks
+            planner.add('workout', query, per_query)
     
     async def _get_spotify_recommendations(self, taste_profile: Dict[str, Any], target_count: int) -> List[TrackInfo]:
         """Use Spotify's powerful recommendations API to discover millions of tracks."""
@@ -257,17 +371,13 @@ class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
             
             # Audio feature targets for workout music
             audio_features = {
-                'target_energy': 0.9,        # VERY high energy (aggressive)
-                'target_danceability': 0.4,  # Lower danceability (more rock/metal)
-                'target_valence': 0.5,       # Neutral/aggressive mood (not too happy)
+                **{f'target_{feature}': value for feature, value in self.targets.items()},
                 'min_tempo': 130,             # Higher minimum BPM (aggressive)
-                'target_tempo': 160,          # Much higher target BPM (fast/aggressive)
                 'min_popularity': 50,         # Popular tracks but allow some variety
                 'target_popularity': 80       # Target popular tracks
             }
             
-            # Multiple recommendation calls for variety
-            for i in range(3):  # 3 batches of recommendations
+            async def recommendation_batch(i: int) -> List[TrackInfo]:
                 try:
                     # Vary the seed combinations for each batch
                     batch_artists = seed_artists[i:i+3] if len(seed_artists) > i else seed_artists[:3]
@@ -285,11 +395,16 @@ class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
                         **varied_features
                     )
                     
-                    tracks.extend(recommendations)
                     logger.info(f"Batch {i+1}: Found {len(recommendations)} recommendations")
+                    return recommendations
                     
                 except Exception as e:
                     logger.warning(f"Recommendation batch {i+1} failed: {e}")
+                    return []
+            
+            # Multiple recommendation calls for variety, issued together
+            results = await self._gather([recommendation_batch(i) for i in range(3)])  # 3 batches of recommendations
+            tracks = [track for batch_tracks in results for track in batch_tracks]
             
             logger.info(f"Total recommendations found: {len(tracks)}")
             
@@ -298,96 +413,35 @@ class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
         
         return tracks
     
-    async def _search_by_audio_features(self, taste_profile: Dict[str, Any], target_count: int) -> List[TrackInfo]:
-        """Search tracks by combining genres with specific audio features."""
-        tracks = []
-        
-        # Audio feature combinations for different workout moods
-        feature_combinations = [
-            # High energy metal/rock
-            {'genre': 'metal', 'energy': '0.8..1.0', 'tempo': '120..180', 'danceability': '0.3..0.8'},
-            # Electronic workout
-            {'genre': 'electronic', 'energy': '0.7..1.0', 'tempo': '128..140', 'danceability': '0.6..1.0'},
-            # Hip hop workout
-            {'genre': 'hip hop', 'energy': '0.6..0.9', 'tempo': '80..120', 'danceability': '0.7..1.0'},
-            # Alternative/indie energy
-            {'genre': 'alternative', 'energy': '0.6..0.9', 'tempo': '100..160', 'valence': '0.4..0.8'},
-        ]
-        
-        for combo in feature_combinations:
-            try:
-                # Build advanced search query
-                query_parts = [f"genre:{combo['genre']}"]
-                
-                # Add audio feature filters
-                for feature, range_val in combo.items():
-                    if feature != 'genre':
-                        query_parts.append(f"{feature}:{range_val}")
-                
-                query = ' '.join(query_parts)
-                search_tracks = await self.spotify.search_tracks(query, limit=target_count // 4)
-                tracks.extend(search_tracks)
-                
-                logger.info(f"Audio feature search '{combo['genre']}': {len(search_tracks)} tracks")
-                
-            except Exception as e:
-                logger.warning(f"Audio feature search failed for {combo}: {e}")
-        
-        return tracks
+    def _plan_audio_feature_searches(self, planner: SearchPlanner, taste_profile: Dict[str, Any], target_count: int) -> None:
+        """Plan searches in genres suited to different workout moods.
+        
+        Spotify search has no audio feature filters, so candidates are ranked
+        against the audio targets locally (see _feature_distances) instead.
+        """
+        # High energy metal/rock, electronic, hip hop and alternative/indie energy
+        for genre in ('metal', 'electronic', 'hip hop', 'alternative'):
+            planner.add('audio_features', f'genre:"{genre}"', target_count // 4)
     
-    async def _search_similar_tracks(self, taste_profile: Dict[str, Any], target_count: int) -> List[TrackInfo]:
-        """Search for tracks similar to user's favorites using track names and artists."""
-        tracks = []
-        
-        try:
-            # Get some reference track names for similarity searches
-            reference_tracks = taste_profile.get('sample_tracks', [])[:10]
+    def _plan_similar_track_searches(self, planner: SearchPlanner, taste_profile: Dict[str, Any], target_count: int) -> None:
+        """Plan searches for tracks similar to user's favorites using track names and artists."""
+        # Get some reference track names for similarity searches
+        reference_tracks = taste_profile.get('sample_tracks', [])[:10]
+        
+        for ref_track in reference_tracks:
+            # Search variations of track/artist names
+            artist_name = ref_track.get('artist', '').split(',')[0].strip()
             
-            for ref_track in reference_tracks:
-                try:
-                    # Search variations of track/artist names
-                    artist_name = ref_track.get('artist', '').split(',')[0].strip()
-                    track_name = ref_track.get('name', '')
-                    
-                    # Search for similar artist styles
-                    if artist_name:
-                        query = f'artist:"{artist_name}" OR genre:"{artist_name.lower()}"'
-                        similar_tracks = await self.spotify.search_tracks(query, limit=5)
-                        tracks.extend(similar_tracks)
-                    
-                except Exception as e:
-                    logger.warning(f"Similar track search failed for {ref_track}: {e}")
-            
-            logger.info(f"Similar track searches found: {len(tracks)} tracks")
-            
-        except Exception as e:
-            logger.warning(f"Similar tracks search failed: {e}")
-        
-        return tracks
+            # Search for similar artist styles
+            if artist_name:
+                planner.add('similar', f'artist:"{artist_name}" OR genre:"{artist_name.lower()}"', 5)
     
-    async def _search_hidden_gems(self, taste_profile: Dict[str, Any], target_count: int) -> List[TrackInfo]:
-        """Search for less popular but quality tracks in user's genres."""
-        tracks = []
-        
+    def _plan_hidden_gem_searches(self, planner: SearchPlanner, taste_profile: Dict[str, Any], target_count: int) -> None:
+        """Plan searches for less popular but quality tracks in user's genres."""
         for genre in taste_profile['genres'][:3]:
-            try:
-                # Search for tracks with lower popularity (hidden gems)
-                queries = [
-                    f'genre:"{genre}" year:2020..2024',  # Recent tracks
-                    f'genre:"{genre}" year:2015..2019',  # Slightly older
-                    f'genre:"{genre}" year:2010..2014',  # Classic period
-                ]
-                
-                for query in queries:
-                    hidden_tracks = await self.spotify.search_tracks(query, limit=target_count // 9)
-                    tracks.extend(hidden_tracks)
-                
-                logger.info(f"Hidden gems for {genre}: {len(tracks)} tracks found")
-                
-            except Exception as e:
-                logger.warning(f"Hidden gems search failed for {genre}: {e}")
-        
-        return tracks
+            # Search for tracks with lower popularity (hidden gems)
+            for years in ('2020..2024', '2015..2019', '2010..2014'):  # Recent, slightly older, classic period
+                planner.add('hidden_gems', f'genre:"{genre}" year:{years}', target_count // 9)
     
     async def _filter_unknown_tracks(self, tracks: List[TrackInfo], known_track_ids: Set[str]) -> List[TrackInfo]:
         """Filter out tracks that the user already knows."""
@@ -396,13 +450,35 @@ class SpotifyDiscoveryEngine(BaseDiscoveryEngine):
         logger.info(f"Filtered out {len(tracks) - len(unknown_tracks)} known tracks")
         return unknown_tracks
     
-    def _select_best_tracks(self, tracks: List[TrackInfo], target_count: int) -> List[TrackInfo]:
-        """Select the best tracks for the playlist."""
+    async def _feature_distances(self, tracks: List[TrackInfo]) -> Dict[str, float]:
+        """Score tracks by weighted audio-feature distance to the targets in one pass.
+        
+        Returns an empty dict when audio features are unavailable to this app.
+        """
+        try:
+            ids, matrix = await self.spotify.get_audio_feature_matrix([track.id for track in tracks], RANKING_FEATURES)
+        except Exception as e:
+            logger.warning(f"Could not get audio features, ranking by popularity only: {e}")
+            return {}
+        
+        return dict(zip(ids, self.ranker.distances(matrix).tolist()))
+    
+    def _select_best_tracks(self, tracks: List[TrackInfo], target_count: int, feature_distances: Dict[str, float] = None) -> List[TrackInfo]:
+        """Select the best tracks for the playlist.
+        
+        Tracks are ordered by audio-feature distance when available (tracks
+        without features last), then by popularity.
+        """
         if len(tracks) <= target_count:
             return tracks
         
-        # Sort by popularity (higher is better) and randomize within popularity tiers
-        sorted_tracks = sorted(tracks, key=lambda t: (t.popularity or 0), reverse=True)
+        # Sort by feature distance (lower is better), then popularity (higher is better),
+        # and randomize within the top tier
+        feature_distances = feature_distances or {}
+        sorted_tracks = sorted(
+            tracks,
+            key=lambda t: (feature_distances.get(t.id, float('inf')), -(t.popularity or 0))
+        )
         
         # Take top tracks with some randomization
         top_tier = sorted_tracks[:target_count * 2]  # Top tier candidates
@@ -1,13 +1,90 @@
 """Spotify service implementation using the modular interface."""
 
+import asyncio
+import bisect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from functools import partial
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable, Set, AsyncIterator
 from pathlib import Path
 
 from loguru import logger
 
+from audio_features_store import AudioFeaturesStore
 from base_music_service import BaseMusicService, MusicServiceType, TrackInfo, PlaylistInfo, ArtistInfo
+from circuit_breaker import CircuitBreakerRegistry
+from rate_limiter import RateLimiter, get_rate_limiter
+from response_cache import ResponseCache
+
+
+# Default number of Spotify requests allowed in flight at once
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Spotify API limit for the several-artists endpoint
+ARTIST_BATCH_SIZE = 50
+
+# Spotify API limit for adding/removing playlist items per request
+PLAYLIST_WRITE_BATCH_SIZE = 100
+
+# Spotify API maximum page size when reading playlist items
+PLAYLIST_PAGE_SIZE = 100
+
+# Transport-level retries for server errors and dropped connections
+SESSION_MAX_RETRIES = 3
+SESSION_RETRY_STATUSES = (500, 502, 503, 504)
+
+# Spotify API maximum page size when reading saved tracks
+SAVED_TRACKS_PAGE_SIZE = 50
+
+# Field filter for lean playlist reads: only what TrackInfo needs, instead of
+# full track objects with album art, available markets and so on
+PLAYLIST_TRACK_FIELDS = (
+    "total,items(track(id,name,uri,duration_ms,explicit,popularity,"
+    "external_urls(spotify),album(name),artists(id,name)))"
+)
+
+# Request pacing shared by every SpotifyService in the process. Spotify does
+# not publish exact limits; search is the most expensive endpoint, so it gets
+# a tighter bucket of its own.
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+ENDPOINT_RATE_LIMITS = {
+    'search': (5.0, 10.0),
+}
+
+# How many times a throttled (429) request is queued and retried
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Consecutive failures (403/5xx or network errors) after which an
+# endpoint is skipped for the rest of the run, e.g. related artists or
+# recommendations for apps without access to them
+CIRCUIT_FAILURE_THRESHOLD = 3
+
+# How long a not-found response (or a search with no results) is remembered
+NEGATIVE_CACHE_TTL = 24 * 3600
+
+# How long the in-memory playlist name index is trusted before its total
+# is re-checked against the API
+PLAYLIST_INDEX_TTL = 300
+
+# Time-to-live (seconds) for responses kept in the on-disk cache. Artist
+# metadata and relations change slowly; top tracks shift a little faster.
+# Recommendations for the same seeds and targets are reused for half a day,
+# and the genre seed list practically never changes.
+CACHE_TTLS = {
+    'artist': 7 * 24 * 3600,
+    'artist_related_artists': 7 * 24 * 3600,
+    'artist_top_tracks': 24 * 3600,
+    'recommendations': 12 * 3600,
+    'recommendations_genre_seeds': 30 * 24 * 3600,
+}
 
 
 class SpotifyService(BaseMusicService):
@@ -17,6 +94,24 @@ class SpotifyService(BaseMusicService):
         """Initialize Spotify service."""
         super().__init__(config)
         self.client: Optional[spotipy.Spotify] = None
+        self.data_dir = Path.home() / ".multi_music_generator" / "spotify"
+        self._response_cache: Optional[ResponseCache] = None
+        self._audio_features_store: Optional[AudioFeaturesStore] = None
+        self.max_concurrency = self._parse_max_concurrency(config.get('SPOTIFY_MAX_CONCURRENCY'))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        # Session-scoped lookups, filled on first use
+        self._user: Optional[Dict[str, Any]] = None
+        self._playlist_index: Optional[Dict[str, PlaylistInfo]] = None
+        self._playlist_total = 0
+        self._playlist_index_checked_at = 0.0
+        self.rate_limiter: RateLimiter = get_rate_limiter(
+            "spotify",
+            rate=DEFAULT_REQUESTS_PER_SECOND,
+            capacity=DEFAULT_REQUESTS_PER_SECOND,
+            endpoint_limits=ENDPOINT_RATE_LIMITS
+        )
+        self.circuit_breakers = CircuitBreakerRegistry(failure_threshold=CIRCUIT_FAILURE_THRESHOLD)
     
     @property
     def service_type(self) -> MusicServiceType:
@@ -50,14 +145,241 @@ class SpotifyService(BaseMusicService):
         if redirect_uri and not (redirect_uri.startswith('http://') or redirect_uri.startswith('https://')):
             errors.append("SPOTIFY_REDIRECT_URI must be a valid HTTP/HTTPS URL")
         
+        max_concurrency = self.config.get('SPOTIFY_MAX_CONCURRENCY')
+        if max_concurrency and (not str(max_concurrency).isdigit() or int(max_concurrency) < 1):
+            errors.append("SPOTIFY_MAX_CONCURRENCY must be a positive integer")
+        
+        for key in ('TARGET_ENERGY', 'TARGET_DANCEABILITY', 'TARGET_VALENCE', 'TARGET_TEMPO'):
+            value = self.config.get(key)
+            if value:
+                try:
+                    float(value)
+                except ValueError:
+                    errors.append(f"{key} must be a number")
+        
+        history_backend = self.config.get('USAGE_HISTORY_BACKEND')
+        if history_backend and history_backend not in ('sqlite', 'json'):
+            errors.append("USAGE_HISTORY_BACKEND must be 'sqlite' or 'json'")
+        
         return len(errors) == 0, errors
     
+    @staticmethod
+    def _parse_max_concurrency(value: Any) -> int:
+        """Parse the configured concurrency limit, falling back to the default."""
+        try:
+            return max(1, int(value))
+        except (TypeError, ValueError):
+            return DEFAULT_MAX_CONCURRENCY
+    
+    def _build_session(self) -> requests.Session:
+        """Create a keep-alive HTTP session with one pooled connection per worker.
+        
+        spotipy only mounts its own retrying adapter on sessions it creates,
+        so the same retry policy for 5xx and connection errors is mounted here.
+        429 is not retried at this level: it is left to the shared rate
+        limiter rather than slept on inside a worker thread.
+        """
+        session = requests.Session()
+        retry = Retry(
+            total=SESSION_MAX_RETRIES,
+            status_forcelist=SESSION_RETRY_STATUSES,
+            backoff_factor=0.3,
+            allowed_methods=None,  # Retry every method, as spotipy does
+            respect_retry_after_header=False,
+            raise_on_status=False  # Surface the final 5xx as a SpotifyException with its real status
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency, max_retries=retry)
+        session.mount('https://', adapter)
+        return session
+    
+    @staticmethod
+    def _track_from_api(track: Dict[str, Any]) -> TrackInfo:
+        """Convert a Spotify track object into a TrackInfo."""
+        artists = track['artists']
+        
+        return TrackInfo(
+            id=track['id'],
+            name=track['name'],
+            artist=', '.join(artist['name'] for artist in artists),
+            album=track['album']['name'],
+            uri=track['uri'],
+            external_url=track['external_urls'].get('spotify', ''),
+            duration_ms=track['duration_ms'],
+            explicit=track['explicit'],
+            popularity=track['popularity'],
+            artist_refs=[
+                {'id': artist['id'], 'name': artist['name']}
+                for artist in artists if artist.get('id')
+            ]
+        )
+    
+    @staticmethod
+    def _playlist_from_api(playlist: Dict[str, Any]) -> PlaylistInfo:
+        """Convert a Spotify playlist object into a PlaylistInfo."""
+        return PlaylistInfo(
+            id=playlist['id'],
+            name=playlist['name'],
+            description=playlist['description'] or "",
+            track_count=playlist['tracks']['total'],
+            external_url=playlist['external_urls']['spotify'],
+            public=playlist['public']
+        )
+    
+    @staticmethod
+    def _artist_from_api(artist: Dict[str, Any]) -> ArtistInfo:
+        """Convert a Spotify artist object into an ArtistInfo."""
+        return ArtistInfo(
+            id=artist['id'],
+            name=artist['name'],
+            genres=artist['genres'],
+            popularity=artist['popularity'],
+            external_url=artist['external_urls']['spotify']
+        )
+    
+    @property
+    def response_cache(self) -> ResponseCache:
+        """On-disk cache for slowly changing responses, opened on first use."""
+        if self._response_cache is None:
+            self._response_cache = ResponseCache(
+                self.data_dir / "response_cache.db",
+                ttls=CACHE_TTLS
+            )
+        return self._response_cache
+    
+    @property
+    def audio_features_store(self) -> AudioFeaturesStore:
+        """Persistent audio features by track ID, opened on first use."""
+        if self._audio_features_store is None:
+            self._audio_features_store = AudioFeaturesStore(self.data_dir / "audio_features.db")
+        return self._audio_features_store
+    
+    @staticmethod
+    def _retry_after(error: spotipy.SpotifyException) -> float:
+        """Read the Retry-After delay (in seconds) from a 429 response."""
+        headers = error.headers or {}
+        try:
+            return max(1.0, float(headers.get('Retry-After', 1)))
+        except (TypeError, ValueError):
+            return 1.0
+    
+    async def _call(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking spotipy call on the bounded worker pool.
+        
+        spotipy is synchronous, so every request is dispatched to a thread pool
+        sized by SPOTIFY_MAX_CONCURRENCY. The event loop stays free while the
+        HTTP round-trip is in flight and concurrent callers overlap for real.
+        
+        Requests are paced by the shared rate limiter. A 429 response pauses
+        the limiter for the Retry-After period and the request is queued again
+        instead of failing.
+        
+        Each endpoint has a circuit breaker: once it has failed repeatedly,
+        further calls raise CircuitOpenError without a round-trip.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="spotify"
+            )
+        
+        endpoint = getattr(func, '__name__', 'request')
+        breaker = self.circuit_breakers.get(endpoint)
+        loop = asyncio.get_running_loop()
+        
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            breaker.check()
+            await self.rate_limiter.acquire(endpoint)
+            try:
+                result = await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+            except spotipy.SpotifyException as e:
+                if e.http_status == 429 and attempt < MAX_RATE_LIMIT_RETRIES:
+                    self.rate_limiter.penalize(endpoint, self._retry_after(e))
+                    continue
+                # A 404 is a per-resource answer (negative-cached by
+                # _call_remembering_not_found), not a sign the endpoint is down
+                if e.http_status == 403 or e.http_status >= 500:
+                    breaker.record_failure()
+                raise
+            except requests.RequestException:
+                breaker.record_failure()
+                raise
+            
+            breaker.record_success()
+            return result
+    
+    async def _call_remembering_not_found(self, func: Callable, key: str, *args, **kwargs) -> Any:
+        """Like _call, but a 404 is cached so the same lookup fails instantly next time."""
+        negative_endpoint = f"{func.__name__}:not_found"
+        if self.response_cache.get(negative_endpoint, key) is not None:
+            raise spotipy.SpotifyException(404, -1, f"{func.__name__}: not found (cached)")
+        
+        try:
+            return await self._call(func, *args, **kwargs)
+        except spotipy.SpotifyException as e:
+            if e.http_status == 404:
+                self.response_cache.set(negative_endpoint, key, True, ttl=NEGATIVE_CACHE_TTL)
+            raise
+    
+    async def _iter_pages(self, func: Callable, *args, page_size: int, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every page of an offset-paginated endpoint, in order.
+        
+        The first page reports the total, so the remaining offsets are all
+        requested at once (bounded by the worker pool and rate limiter)
+        instead of following 'next' links one by one. Each page is yielded as
+        soon as it and the pages before it have arrived.
+        """
+        first_page = await self._call(func, *args, limit=page_size, offset=0, **kwargs)
+        
+        pending = [
+            asyncio.ensure_future(self._call(func, *args, limit=page_size, offset=offset, **kwargs))
+            for offset in range(page_size, first_page['total'], page_size)
+        ]
+        
+        try:
+            yield first_page
+            for page in pending:
+                yield await page
+        finally:
+            # The consumer stopped early or a page failed
+            for page in pending:
+                page.cancel()
+    
+    async def _fetch_all_pages(self, func: Callable, *args, page_size: int, **kwargs) -> List[Dict[str, Any]]:
+        """Fetch every page of an offset-paginated endpoint (see _iter_pages)."""
+        return [page async for page in self._iter_pages(func, *args, page_size=page_size, **kwargs)]
+    
+    async def _shared_call(self, func: Callable, *args, **kwargs) -> Any:
+        """Like _call, but concurrent identical read requests share one round-trip.
+        
+        Only use this for reads: the raw response is handed to every caller.
+        """
+        key = ResponseCache.make_key(*args, **kwargs)
+        return await self._single_flight(
+            (func.__name__, key),
+            lambda: self._call_remembering_not_found(func, key, *args, **kwargs)
+        )
+    
+    async def _cached_call(self, func: Callable, *args, **kwargs) -> Any:
+        """Like _shared_call, but serve the response from the on-disk cache when fresh."""
+        endpoint = func.__name__
+        key = ResponseCache.make_key(*args, **kwargs)
+        
+        async def fetch() -> Any:
+            cached = self.response_cache.get(endpoint, key)
+            if cached is not None:
+                return cached
+            
+            result = await self._call_remembering_not_found(func, key, *args, **kwargs)
+            self.response_cache.set(endpoint, key, result)
+            return result
+        
+        return await self._single_flight((endpoint, key), fetch)
+    
     async def authenticate(self) -> bool:
         """Authenticate with Spotify."""
         try:
             # Setup cache directory
-            cache_dir = Path.home() / ".multi_music_generator" / "spotify"
-            cache_dir.mkdir(parents=True, exist_ok=True)
+            self.data_dir.mkdir(parents=True, exist_ok=True)
             
             # Set up OAuth with required scopes
             scope = "playlist-modify-public playlist-modify-private playlist-read-private user-library-read"
@@ -67,14 +389,20 @@ class SpotifyService(BaseMusicService):
                 client_secret=self.config['SPOTIFY_CLIENT_SECRET'],
                 redirect_uri=self.config['SPOTIFY_REDIRECT_URI'],
                 scope=scope,
-                cache_path=str(cache_dir / ".spotify_cache")
+                cache_path=str(self.data_dir / ".spotify_cache")
             )
             
-            self.client = spotipy.Spotify(auth_manager=auth_manager)
+            # Retries come from the session's adapter (see _build_session);
+            # spotipy ignores its own retry arguments for a supplied session
+            self.client = spotipy.Spotify(
+                auth_manager=auth_manager,
+                requests_session=self._build_session()
+            )
             
             # Test authentication by getting current user
-            user = self.client.current_user()
+            user = await self._call(self.client.current_user)
             if user:
+                self._user = user
                 self.authenticated = True
                 logger.info(f"Successfully authenticated with Spotify as: {user['display_name']} ({user['id']})")
                 return True
@@ -90,7 +418,7 @@ class SpotifyService(BaseMusicService):
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         
-        user = self.client.current_user()
+        user = await self._get_user()
         return {
             'id': user['id'],
             'name': user.get('display_name', 'Unknown'),
@@ -99,83 +427,113 @@ class SpotifyService(BaseMusicService):
             'external_url': user.get('external_urls', {}).get('spotify', '')
         }
     
-    async def get_playlist_tracks(self, playlist_id: str) -> List[TrackInfo]:
-        """Get all tracks from a Spotify playlist."""
+    async def get_playlist_tracks(self, playlist_id: str, lean: bool = True) -> List[TrackInfo]:
+        """Get all tracks from a Spotify playlist (see iter_playlist_tracks)."""
+        tracks = [track async for page in self.iter_playlist_tracks(playlist_id, lean=lean) for track in page]
+        
+        logger.info(f"Retrieved {len(tracks)} tracks from playlist {playlist_id}")
+        return tracks
+    
+    async def get_playlist_snapshot_id(self, playlist_id: str) -> str:
+        """Get a playlist's current snapshot_id, which changes on every edit."""
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         
-        tracks = []
-        results = self.client.playlist_tracks(playlist_id)
+        snapshot = await self._call(self.client.playlist, playlist_id, fields="snapshot_id")
+        return snapshot['snapshot_id']
+    
+    async def iter_playlist_tracks(self, playlist_id: str, lean: bool = True,
+                                   snapshot_id: Optional[str] = None) -> AsyncIterator[List[TrackInfo]]:
+        """Yield the tracks of a Spotify playlist page by page as they arrive.
         
-        while results:
-            for item in results['items']:
-                if item['track'] and item['track']['id']:
-                    track = item['track']
-                    
-                    # Get artist names
-                    artists = [artist['name'] for artist in track['artists']]
-                    
-                    track_info = TrackInfo(
-                        id=track['id'],
-                        name=track['name'],
-                        artist=', '.join(artists),
-                        album=track['album']['name'],
-                        uri=track['uri'],
-                        external_url=track['external_urls']['spotify'],
-                        duration_ms=track['duration_ms'],
-                        explicit=track['explicit'],
-                        popularity=track['popularity']
-                    )
-                    tracks.append(track_info)
-            
-            # Check if there are more pages
-            if results['next']:
-                results = self.client.next(results)
-            else:
-                results = None
+        Contents are cached on disk under the playlist's snapshot_id, which
+        Spotify changes on every edit. A single metadata request confirms the
+        snapshot (skipped when the caller passes a snapshot_id it just read),
+        so an unchanged playlist loads without paging its items.
         
-        logger.info(f"Retrieved {len(tracks)} tracks from playlist {playlist_id}")
-        return tracks
+        In lean mode Spotify is asked to return only the fields TrackInfo is
+        built from, which shrinks the payload and JSON decode time for large
+        playlists. Pass lean=False to download full track objects.
+        """
+        if not self.authenticated or not self.client:
+            raise Exception("Not authenticated with Spotify")
+        
+        if snapshot_id is None:
+            snapshot_id = await self.get_playlist_snapshot_id(playlist_id)
+        key = ResponseCache.make_key(playlist_id, lean)
+        
+        cached = self.response_cache.get('playlist_snapshot', key)
+        if cached is not None and cached['snapshot_id'] == snapshot_id:
+            logger.debug(f"Playlist {playlist_id} unchanged, loading tracks from cache")
+            cached_tracks = cached['tracks']
+            for start in range(0, len(cached_tracks), PLAYLIST_PAGE_SIZE):
+                yield [TrackInfo(**track) for track in cached_tracks[start:start + PLAYLIST_PAGE_SIZE]]
+            return
+        
+        track_dicts = []
+        pages = self._iter_pages(
+            self.client.playlist_items,
+            playlist_id,
+            page_size=PLAYLIST_PAGE_SIZE,
+            fields=PLAYLIST_TRACK_FIELDS if lean else None,
+            additional_types=('track',)
+        )
+        async for page in pages:
+            tracks = [
+                self._track_from_api(item['track'])
+                for item in page['items']
+                if item['track'] and item['track']['id']
+            ]
+            track_dicts.extend(asdict(track) for track in tracks)
+            yield tracks
+        
+        # Contents only change along with the snapshot, so no TTL is needed
+        self.response_cache.set(
+            'playlist_snapshot', key,
+            {'snapshot_id': snapshot_id, 'tracks': track_dicts},
+            ttl=None
+        )
     
     async def create_playlist(self, name: str, description: str = "", public: bool = True) -> PlaylistInfo:
         """Create a new Spotify playlist."""
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         
-        user = self.client.current_user()
-        playlist = self.client.user_playlist_create(
+        user = await self._get_user()
+        playlist = await self._call(
+            self.client.user_playlist_create,
             user=user['id'],
             name=name,
             public=public,
             description=description
         )
         
-        playlist_info = PlaylistInfo(
-            id=playlist['id'],
-            name=playlist['name'],
-            description=playlist['description'],
-            track_count=playlist['tracks']['total'],
-            external_url=playlist['external_urls']['spotify'],
-            public=playlist['public']
-        )
+        playlist_info = self._playlist_from_api(playlist)
+        
+        # Keep the name index current without another listing
+        if self._playlist_index is not None:
+            self._playlist_index.setdefault(playlist_info.name, playlist_info)
+            self._playlist_total += 1
         
         logger.info(f"Created playlist: {name} ({playlist['id']})")
         return playlist_info
     
-    async def update_playlist_tracks(self, playlist_id: str, track_uris: List[str]) -> bool:
-        """Update Spotify playlist with new tracks."""
+    async def update_playlist_tracks(self, playlist_id: str, track_uris: List[str], sync: bool = True) -> bool:
+        """Update Spotify playlist with new tracks.
+        
+        With sync enabled the current contents are diffed against track_uris
+        and only the needed removals, additions and moves are sent (nothing
+        at all when the playlist is already identical). Otherwise, or when a
+        full replace needs fewer requests, the contents are replaced.
+        """
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         
         try:
-            # Clear existing tracks
-            self.client.playlist_replace_items(playlist_id, [])
+            if sync and await self._sync_playlist_tracks(playlist_id, track_uris):
+                return True
             
-            # Add new tracks in batches (Spotify API limit is 100 per request)
-            batch_size = 100
-            for i in range(0, len(track_uris), batch_size):
-                batch = track_uris[i:i + batch_size]
-                self.client.playlist_add_items(playlist_id, batch)
+            await self._replace_playlist_tracks(playlist_id, track_uris)
             
             logger.info(f"Updated playlist {playlist_id} with {len(track_uris)} tracks")
             return True
@@ -184,56 +542,205 @@ class SpotifyService(BaseMusicService):
             logger.error(f"Failed to update playlist {playlist_id}: {e}")
             return False
     
+    async def _replace_playlist_tracks(self, playlist_id: str, track_uris: List[str]) -> None:
+        """Overwrite playlist contents, replacing with the first batch directly.
+        
+        Replacing with real tracks (rather than clearing first) means the
+        playlist is never empty while the update is in progress.
+        """
+        batch_size = PLAYLIST_WRITE_BATCH_SIZE
+        await self._call(self.client.playlist_replace_items, playlist_id, track_uris[:batch_size])
+        
+        for i in range(batch_size, len(track_uris), batch_size):
+            batch = track_uris[i:i + batch_size]
+            await self._call(self.client.playlist_add_items, playlist_id, batch)
+    
+    async def _get_playlist_uris(self, playlist_id: str) -> Tuple[List[Optional[str]], str]:
+        """Get the current item URIs (None for unavailable items) and snapshot ID."""
+        playlist = await self._call(
+            self.client.playlist,
+            playlist_id,
+            fields="snapshot_id,tracks(items(track(uri)),next)"
+        )
+        
+        uris = []
+        results = playlist['tracks']
+        while results:
+            uris.extend((item.get('track') or {}).get('uri') for item in results['items'])
+            results = await self._call(self.client.next, results) if results['next'] else None
+        
+        return uris, playlist['snapshot_id']
+    
+    @staticmethod
+    def _plan_playlist_sync(current: List[str], target: List[str]) -> Tuple[List[str], List[str], List[Tuple[int, int]]]:
+        """Compute the removals, additions and moves turning current into target.
+        
+        Tracks whose relative order already matches the target (the longest
+        increasing subsequence of their target positions) stay put; every
+        other track is moved once, right after its predecessor in the target.
+        
+        Returns:
+            Tuple of (uris_to_remove, uris_to_append, [(range_start, insert_before), ...])
+        """
+        target_positions = {uri: index for index, uri in enumerate(target)}
+        current_uris = set(current)
+        
+        removals = [uri for uri in current if uri not in target_positions]
+        additions = [uri for uri in target if uri not in current_uris]
+        working = [uri for uri in current if uri in target_positions] + additions
+        
+        # Longest increasing subsequence of target positions (patience sorting)
+        positions = [target_positions[uri] for uri in working]
+        tails, tail_indices, previous = [], [], [-1] * len(positions)
+        for i, position in enumerate(positions):
+            slot = bisect.bisect_left(tails, position)
+            if slot == len(tails):
+                tails.append(position)
+                tail_indices.append(i)
+            else:
+                tails[slot] = position
+                tail_indices[slot] = i
+            previous[i] = tail_indices[slot - 1] if slot > 0 else -1
+        
+        in_place = set()
+        i = tail_indices[-1] if tail_indices else -1
+        while i >= 0:
+            in_place.add(working[i])
+            i = previous[i]
+        
+        moves = []
+        for index, uri in enumerate(target):
+            if uri in in_place:
+                continue
+            range_start = working.index(uri)
+            insert_before = working.index(target[index - 1]) + 1 if index > 0 else 0
+            moves.append((range_start, insert_before))
+            
+            working.pop(range_start)
+            working.insert(insert_before - 1 if range_start < insert_before else insert_before, uri)
+            in_place.add(uri)
+        
+        return removals, additions, moves
+    
+    async def _sync_playlist_tracks(self, playlist_id: str, track_uris: List[str]) -> bool:
+        """Bring a playlist in line with track_uris using the fewest write requests.
+        
+        Returns:
+            bool: True if the playlist is now up to date, False if a full
+            replace is cheaper or the diff cannot be applied safely
+        """
+        current, snapshot_id = await self._get_playlist_uris(playlist_id)
+        
+        if current == track_uris:
+            logger.info(f"Playlist {playlist_id} already up to date, skipping write")
+            return True
+        
+        # Duplicates and unavailable items make positions ambiguous
+        if None in current or len(set(current)) != len(current) or len(set(track_uris)) != len(track_uris):
+            return False
+        
+        removals, additions, moves = self._plan_playlist_sync(current, track_uris)
+        
+        batch_size = PLAYLIST_WRITE_BATCH_SIZE
+        diff_cost = -(-len(removals) // batch_size) + -(-len(additions) // batch_size) + len(moves)
+        replace_cost = max(1, -(-len(track_uris) // batch_size))
+        if diff_cost > replace_cost:
+            return False
+        
+        for i in range(0, len(removals), batch_size):
+            result = await self._call(
+                self.client.playlist_remove_all_occurrences_of_items,
+                playlist_id, removals[i:i + batch_size], snapshot_id=snapshot_id
+            )
+            snapshot_id = result['snapshot_id']
+        
+        for i in range(0, len(additions), batch_size):
+            result = await self._call(self.client.playlist_add_items, playlist_id, additions[i:i + batch_size])
+            snapshot_id = result['snapshot_id']
+        
+        for range_start, insert_before in moves:
+            result = await self._call(
+                self.client.playlist_reorder_items,
+                playlist_id, range_start=range_start, insert_before=insert_before, snapshot_id=snapshot_id
+            )
+            snapshot_id = result['snapshot_id']
+        
+        logger.info(
+            f"Synced playlist {playlist_id}: {len(removals)} removed, "
+            f"{len(additions)} added, {len(moves)} moved"
+        )
+        return True
+    
     async def find_playlist_by_name(self, name: str) -> Optional[PlaylistInfo]:
         """Find a Spotify playlist by name."""
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         
-        user = self.client.current_user()
-        playlists = self.client.user_playlists(user['id'])
+        index = await self._get_playlist_index()
+        return index.get(name)
+    
+    async def _get_user(self) -> Dict[str, Any]:
+        """Get the current user's profile, fetched once per session."""
+        if self._user is None:
+            self._user = await self._call(self.client.current_user)
+        return self._user
+    
+    async def _get_playlist_index(self) -> Dict[str, PlaylistInfo]:
+        """Get the name -> PlaylistInfo index of the user's playlists.
+        
+        The index is built once per session. After PLAYLIST_INDEX_TTL it is
+        revalidated with a single one-item listing: if the library's total
+        has not changed the index is kept, otherwise it is rebuilt.
+        """
+        user = await self._get_user()
+        now = time.monotonic()
+        
+        if self._playlist_index is not None:
+            if now - self._playlist_index_checked_at < PLAYLIST_INDEX_TTL:
+                return self._playlist_index
+            
+            first_page = await self._call(self.client.user_playlists, user['id'], limit=1)
+            self._playlist_index_checked_at = now
+            if first_page['total'] == self._playlist_total:
+                return self._playlist_index
+        
+        index = {}
+        playlists = await self._call(self.client.user_playlists, user['id'])
+        total = playlists['total']
         
         while playlists:
             for playlist in playlists['items']:
-                if playlist['name'] == name:
-                    return PlaylistInfo(
-                        id=playlist['id'],
-                        name=playlist['name'],
-                        description=playlist['description'] or "",
-                        track_count=playlist['tracks']['total'],
-                        external_url=playlist['external_urls']['spotify'],
-                        public=playlist['public']
-                    )
+                # Keep the first match, as a linear scan would
+                index.setdefault(playlist['name'], self._playlist_from_api(playlist))
             
             if playlists['next']:
-                playlists = self.client.next(playlists)
+                playlists = await self._call(self.client.next, playlists)
             else:
                 playlists = None
         
-        return None
+        self._playlist_index = index
+        self._playlist_total = total
+        self._playlist_index_checked_at = now
+        logger.debug(f"Indexed {len(index)} Spotify playlists by name")
+        return index
     
     async def search_tracks(self, query: str, limit: int = 20) -> List[TrackInfo]:
         """Search for tracks on Spotify."""
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         
-        results = self.client.search(q=query, type='track', limit=limit, market='US')
-        tracks = []
+        # Queries known to match nothing are not sent again for a while
+        key = ResponseCache.make_key(query)
+        if self.response_cache.get('search:no_results', key) is not None:
+            return []
         
+        results = await self._shared_call(self.client.search, q=query, type='track', limit=limit, market='US')
+        if not results['tracks']['items']:
+            self.response_cache.set('search:no_results', key, True, ttl=NEGATIVE_CACHE_TTL)
+        
+        tracks = []
         for track in results['tracks']['items']:
-            artists = [artist['name'] for artist in track['artists']]
-            
-            track_info = TrackInfo(
-                id=track['id'],
-                name=track['name'],
-                artist=', '.join(artists),
-                album=track['album']['name'],
-                uri=track['uri'],
-                external_url=track['external_urls']['spotify'],
-                duration_ms=track['duration_ms'],
-                explicit=track['explicit'],
-                popularity=track['popularity']
-            )
-            tracks.append(track_info)
+            tracks.append(self._track_from_api(track))
         
         return tracks
     
@@ -242,33 +749,45 @@ class SpotifyService(BaseMusicService):
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         
-        artist = self.client.artist(artist_id)
+        artist = await self._cached_call(self.client.artist, artist_id)
         
-        return ArtistInfo(
-            id=artist['id'],
-            name=artist['name'],
-            genres=artist['genres'],
-            popularity=artist['popularity'],
-            external_url=artist['external_urls']['spotify']
-        )
+        return self._artist_from_api(artist)
+    
+    async def get_artists_info(self, artist_ids: List[str]) -> List[ArtistInfo]:
+        """Get Spotify artist information in batches of 50, fetched concurrently."""
+        if not self.authenticated or not self.client:
+            raise Exception("Not authenticated with Spotify")
+        
+        # Serve what we can from the per-artist cache shared with get_artist_info
+        unique_ids = list(dict.fromkeys(artist_ids))
+        artists = {}
+        for artist_id in unique_ids:
+            cached = self.response_cache.get('artist', ResponseCache.make_key(artist_id))
+            if cached is not None:
+                artists[artist_id] = cached
+        
+        missing_ids = [artist_id for artist_id in unique_ids if artist_id not in artists]
+        batches = [missing_ids[i:i + ARTIST_BATCH_SIZE] for i in range(0, len(missing_ids), ARTIST_BATCH_SIZE)]
+        results = await asyncio.gather(*[self._shared_call(self.client.artists, batch) for batch in batches])
+        
+        for result in results:
+            for artist in result['artists']:
+                if artist:  # Unknown IDs come back as null entries
+                    artists[artist['id']] = artist
+                    self.response_cache.set('artist', ResponseCache.make_key(artist['id']), artist)
+        
+        return [self._artist_from_api(artists[artist_id]) for artist_id in unique_ids if artist_id in artists]
     
     async def get_related_artists(self, artist_id: str) -> List[ArtistInfo]:
         """Get artists related to the given Spotify artist."""
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         
-        results = self.client.artist_related_artists(artist_id)
+        results = await self._cached_call(self.client.artist_related_artists, artist_id)
         artists = []
         
         for artist in results['artists']:
-            artist_info = ArtistInfo(
-                id=artist['id'],
-                name=artist['name'],
-                genres=artist['genres'],
-                popularity=artist['popularity'],
-                external_url=artist['external_urls']['spotify']
-            )
-            artists.append(artist_info)
+            artists.append(self._artist_from_api(artist))
         
         return artists
     
@@ -277,24 +796,11 @@ class SpotifyService(BaseMusicService):
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         
-        results = self.client.artist_top_tracks(artist_id, country='US')
+        results = await self._cached_call(self.client.artist_top_tracks, artist_id, country='US')
         tracks = []
         
         for track in results['tracks'][:limit]:
-            artists = [artist['name'] for artist in track['artists']]
-            
-            track_info = TrackInfo(
-                id=track['id'],
-                name=track['name'],
-                artist=', '.join(artists),
-                album=track['album']['name'],
-                uri=track['uri'],
-                external_url=track['external_urls']['spotify'],
-                duration_ms=track['duration_ms'],
-                explicit=track['explicit'],
-                popularity=track['popularity']
-            )
-            tracks.append(track_info)
+            tracks.append(self._track_from_api(track))
         
         return tracks
     
@@ -303,34 +809,94 @@ class SpotifyService(BaseMusicService):
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         
+        page_size = SAVED_TRACKS_PAGE_SIZE
+        pages = await asyncio.gather(*[
+            self._call(self.client.current_user_saved_tracks, limit=min(page_size, limit - offset), offset=offset)
+            for offset in range(0, limit, page_size)
+        ])
+        
         tracks = []
-        results = self.client.current_user_saved_tracks(limit=min(limit, 50))
+        for page in pages:
+            for item in page['items']:
+                if item['track'] and item['track']['id']:
+                    tracks.append(self._track_from_api(item['track']))
         
-        for item in results['items']:
-            track = item['track']
-            artists = [artist['name'] for artist in track['artists']]
+        return tracks
+    
+    async def get_saved_track_ids(self) -> Set[str]:
+        """Get the IDs of every track in the user's library via a local mirror.
+        
+        The first call paginates the whole library concurrently. Later calls
+        walk the library newest-first (Spotify orders it by added_at) and stop
+        at the first track already mirrored, so a steady-state run costs one
+        request. If the library total no longer matches the mirror, tracks
+        were removed and the mirror is rebuilt.
+        """
+        if not self.authenticated or not self.client:
+            raise Exception("Not authenticated with Spotify")
+        
+        user = await self._get_user()
+        key = ResponseCache.make_key(user['id'])
+        mirror = self.response_cache.get('saved_library', key)
+        
+        entries = None
+        if mirror is not None:
+            entries = await self._sync_saved_library(mirror)
+        
+        if entries is None:
+            pages = await self._fetch_all_pages(self.client.current_user_saved_tracks, page_size=SAVED_TRACKS_PAGE_SIZE)
+            entries = [self._saved_library_entry(item) for page in pages for item in page['items']]
+            logger.info(f"Mirrored {len(entries)} saved tracks from Spotify library")
+        
+        self.response_cache.set('saved_library', key, {'tracks': entries}, ttl=None)
+        return {track_id for track_id, added_at in entries if track_id}
+    
+    @staticmethod
+    def _saved_library_entry(item: Dict[str, Any]) -> List[Optional[str]]:
+        """Reduce a saved-track item to [track_id, added_at] (id is None for unavailable tracks)."""
+        return [(item.get('track') or {}).get('id'), item.get('added_at')]
+    
+    async def _sync_saved_library(self, mirror: Dict[str, Any]) -> Optional[List[List[Optional[str]]]]:
+        """Prepend newly saved tracks to the mirror.
+        
+        Returns:
+            Updated mirror entries, or None if the mirror must be rebuilt
+        """
+        entries = mirror['tracks']
+        known_ids = {track_id for track_id, added_at in entries if track_id}
+        new_entries = []
+        offset = 0
+        
+        while True:
+            page = await self._call(self.client.current_user_saved_tracks, limit=SAVED_TRACKS_PAGE_SIZE, offset=offset)
             
-            track_info = TrackInfo(
-                id=track['id'],
-                name=track['name'],
-                artist=', '.join(artists),
-                album=track['album']['name'],
-                uri=track['uri'],
-                external_url=track['external_urls']['spotify'],
-                duration_ms=track['duration_ms'],
-                explicit=track['explicit'],
-                popularity=track['popularity']
-            )
-            tracks.append(track_info)
+            reached_known = False
+            for item in page['items']:
+                entry = self._saved_library_entry(item)
+                if entry[0] in known_ids:
+                    reached_known = True
+                    break
+                new_entries.append(entry)
+            
+            if reached_known or not page['next']:
+                break
+            offset += SAVED_TRACKS_PAGE_SIZE
         
-        return tracks 
+        entries = new_entries + entries
+        if len(entries) != page['total']:
+            logger.info("Saved library changed beyond new additions, rebuilding mirror")
+            return None
+        
+        if new_entries:
+            logger.info(f"Added {len(new_entries)} newly saved tracks to library mirror")
+        return entries
 
     async def get_recently_played_ids(self, limit: int = 50) -> List[str]:
         """Get IDs of recently played tracks to avoid repeats."""
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         try:
-            results = self.client.current_user_recently_played(limit=min(limit, 50))
+            results = await self._call(self.client.current_user_recently_played, limit=min(limit, 50))
             ids = []
             for item in results.get('items', []):
                 track = item.get('track') or {}
@@ -371,23 +937,11 @@ class SpotifyService(BaseMusicService):
                 params[key] = value
             
             # Make API call
-            result = self.client.recommendations(**params)
+            # Cached by seeds and feature targets
+            result = await self._cached_call(self.client.recommendations, **params)
             
             # Convert to TrackInfo objects
-            tracks = []
-            for track in result['tracks']:
-                track_info = TrackInfo(
-                    id=track['id'],
-                    name=track['name'],
-                    artist=', '.join([artist['name'] for artist in track['artists']]),
-                    album=track['album']['name'],
-                    uri=track['uri'],
-                    external_url=track['external_urls'].get('spotify', ''),
-                    duration_ms=track['duration_ms'],
-                    explicit=track['explicit'],
-                    popularity=track['popularity']
-                )
-                tracks.append(track_info)
+            tracks = [self._track_from_api(track) for track in result['tracks']]
             
             logger.info(f"Got {len(tracks)} recommendations from Spotify API")
             return tracks
@@ -396,12 +950,30 @@ class SpotifyService(BaseMusicService):
             logger.error(f"Failed to get recommendations: {e}")
             return []
 
+    async def get_audio_feature_matrix(self, track_ids: List[str], columns: List[str] = None) -> Tuple[List[str], np.ndarray]:
+        """Get audio features as a contiguous matrix, one row per track.
+        
+        Features never change, so only tracks missing from the local store
+        are requested, in concurrent batches of 100.
+        
+        Returns:
+            (ids, matrix): tracks with features, in input order, and their rows
+        """
+        if not self.authenticated or not self.client:
+            raise Exception("Not authenticated with Spotify")
+        
+        batches = self.audio_features_store.missing_batches(track_ids)
+        results = await asyncio.gather(*[self._call(self.client.audio_features, batch) for batch in batches])
+        self.audio_features_store.put_batches(batches, results)
+        
+        return self.audio_features_store.as_array(track_ids, columns)
+    
     async def get_available_genre_seeds(self) -> List[str]:
         """Get Spotify's allowed genre seeds for recommendations."""
         if not self.authenticated or not self.client:
             raise Exception("Not authenticated with Spotify")
         try:
-            result = self.client.recommendations_genre_seeds()
+            result = await self._cached_call(self.client.recommendations_genre_seeds)
             return result.get('genres', [])
         except Exception as e:
             logger.warning(f"Failed to fetch available genre seeds: {e}")
@@ -1,16 +1,83 @@
 """YouTube Music curator implementation."""
 
-import json
 import random
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Set, Tuple
 from pathlib import Path
-from collections import Counter
+from collections import Counter, defaultdict
 
 from loguru import logger
 
 from base_music_service import BaseCurator, TrackInfo
 from services.youtube_service import YouTubeMusicService
+from usage_event_log import YouTubeUsageEventLog, usage_event, epoch_now, SECONDS_PER_DAY
+
+
+def _normalize(value: Optional[str]) -> str:
+    """Lowercase and strip a track name or artist for matching."""
+    return (value or '').lower().strip()
+
+
+@dataclass
+class UsageHistoryIndex:
+    """Inverted index of the usage history, built once per curation run.
+    
+    Maps video IDs and normalized names/artists to the dates they were
+    used, so a track's usage is found with a few dictionary lookups instead
+    of a scan over every day and every track in the history.
+    """
+    usage_dates: Dict[str, int] = field(default_factory=dict)  # History date string -> epoch of its midnight
+    by_id: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
+    by_name_artist: Dict[Tuple[str, str], Set[str]] = field(default_factory=lambda: defaultdict(set))
+    by_name: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))  # Any artist
+    by_name_without_artist: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
+    
+    @classmethod
+    def build(cls, history: Dict) -> 'UsageHistoryIndex':
+        """Index a {date: {'tracks': [...]}} usage history (invalid dates are skipped)."""
+        index = cls()
+        
+        for date_str, data in history.items():
+            try:
+                index.usage_dates[date_str] = int(datetime.strptime(date_str, '%Y-%m-%d').timestamp())
+            except ValueError:
+                continue
+            
+            for used_track in data.get('tracks', []):
+                if used_track.get('id'):
+                    index.by_id[used_track['id']].add(date_str)
+                
+                used_name = _normalize(used_track.get('name'))
+                if not used_name:
+                    continue
+                used_artist = _normalize(used_track.get('artist'))
+                index.by_name[used_name].add(date_str)
+                if used_artist:
+                    index.by_name_artist[(used_name, used_artist)].add(date_str)
+                else:
+                    index.by_name_without_artist[used_name].add(date_str)
+        
+        return index
+    
+    def dates_used(self, track: TrackInfo) -> Set[str]:
+        """Get the history dates a track was used on.
+        
+        A track matches by video ID, or by name when the artists are equal
+        or either one is unknown (YouTube IDs can be unreliable).
+        """
+        dates = set(self.by_id.get(track.id, ()))
+        
+        name = _normalize(track.name)
+        if name:
+            artist = _normalize(track.artist)
+            if artist:
+                dates.update(self.by_name_artist.get((name, artist), ()))
+                dates.update(self.by_name_without_artist.get(name, ()))
+            else:
+                dates.update(self.by_name.get(name, ()))
+        
+        return dates
 
 
 class YouTubeCurator(BaseCurator):
@@ -21,29 +88,39 @@ class YouTubeCurator(BaseCurator):
         super().__init__(music_service)
         self.youtube = music_service
         self.history_file = Path.cwd() / "youtube_usage_history.json"
+        self.history_log = YouTubeUsageEventLog(self.history_file)
     
     async def generate_curated_playlist(self, reference_playlist_id: str, target_size: int = 30) -> Dict[str, Any]:
         """Generate a curated playlist from existing YouTube Music tracks."""
         try:
             logger.info("Generating curated YouTube Music playlist with enhanced variety algorithms")
             
-            # Get reference playlist tracks
-            reference_tracks = await self.youtube.get_playlist_tracks(reference_playlist_id)
+            now = epoch_now()  # One clock reading for every recency calculation of this run
+            
+            # Load usage history and index it for scoring
+            usage_history = self._load_usage_history()
+            history_index = UsageHistoryIndex.build(usage_history)
+            
+            # Score reference playlist tracks page by page as iter_playlist_tracks converts them
+            reference_tracks = []
+            track_scores = []
+            async for page in self.youtube.iter_playlist_tracks(reference_playlist_id):
+                reference_tracks.extend(page)
+                track_scores.extend(self._calculate_track_score(track, history_index, now) for track in page)
             logger.info(f"Reference playlist has {len(reference_tracks)} tracks")
             
             if not reference_tracks:
                 raise ValueError("Reference playlist is empty")
             
-            # Load usage history
-            usage_history = self._load_usage_history()
-            
             # Smart selection with variety optimization
-            selected_tracks = await self._smart_select_with_history(reference_tracks, usage_history, target_size, reference_playlist_id)
+            selected_tracks = await self._smart_select_with_history(
+                reference_tracks, usage_history, target_size, reference_playlist_id, history_index, now, track_scores
+            )
             
             logger.info(f"Selected {len(selected_tracks)} tracks with optimized variety")
             
             # Create playlist
-            today = datetime.now()
+            today = datetime.fromtimestamp(now)
             playlist_name = f"Curated Workout - {today.strftime('%Y-%m-%d')}"
             
             # Check if playlist already exists
@@ -66,32 +143,22 @@ class YouTubeCurator(BaseCurator):
                 logger.warning("Failed to update playlist tracks")
             
             # Get selection stats for freshness score
-            selection_stats = self._get_selection_stats(selected_tracks, reference_tracks, usage_history)
+            selection_stats = self._get_selection_stats(selected_tracks, reference_tracks, usage_history, history_index)
             
             # Calculate freshness score - simpler approach
             # Count tracks that haven't been used recently (last 7 days)
-            recent_cutoff = datetime.now() - timedelta(days=7)
+            recent_cutoff = now - 7 * SECONDS_PER_DAY
             recently_used = 0
             
             for track in selected_tracks[:actual_track_count]:
-                is_recently_used = False
-                for date_str, date_data in usage_history.items():
-                    try:
-                        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                        if date_obj >= recent_cutoff:
-                            if any(t.get('id') == track.id for t in date_data.get('tracks', [])):
-                                recently_used += 1
-                                is_recently_used = True
-                                break
-                    except (ValueError, KeyError):
-                        continue
-                    if is_recently_used:
-                        break
+                if any(history_index.usage_dates[date_str] >= recent_cutoff
+                       for date_str in history_index.by_id.get(track.id, ())):
+                    recently_used += 1
             
             freshness_score = round(((actual_track_count - recently_used) / actual_track_count) * 100, 1) if actual_track_count > 0 else 100.0
             
             # Update usage history AFTER calculating freshness
-            self._update_usage_history(selected_tracks, usage_history)
+            self._update_usage_history(selected_tracks, usage_history, playlist_info.name, now)
             
             return {
                 'playlist_id': playlist_info.id,
@@ -144,17 +211,23 @@ class YouTubeCurator(BaseCurator):
             'recent_activity': sorted(curation_dates, reverse=True)[:10]
         }
     
-    async def _smart_select_with_history(self, tracks: List[TrackInfo], history: Dict, target_size: int, reference_playlist_id: str = None) -> List[TrackInfo]:
-        """Smart track selection considering usage history and variety."""
+    async def _smart_select_with_history(self, tracks: List[TrackInfo], history: Dict, target_size: int, reference_playlist_id: str = None, history_index: Optional[UsageHistoryIndex] = None, now: Optional[int] = None, track_scores: Optional[List[float]] = None) -> List[TrackInfo]:
+        """Smart track selection considering usage history and variety.
+        
+        `track_scores` may hold each track's _calculate_track_score, already
+        computed while the playlist was streaming in.
+        """
         if len(tracks) <= target_size:
             return tracks
         
-        # Score each track based on history and variety factors
-        scored_tracks = []
+        if history_index is None:
+            history_index = UsageHistoryIndex.build(history)
         
-        for track in tracks:
-            score = self._calculate_track_score(track, history)
-            scored_tracks.append((track, score))
+        # Score each track based on history and variety factors
+        now = now or epoch_now()
+        if track_scores is None:
+            track_scores = [self._calculate_track_score(track, history_index, now) for track in tracks]
+        scored_tracks = list(zip(tracks, track_scores))
         
         # Sort by score (higher is better)
         scored_tracks.sort(key=lambda x: x[1], reverse=True)
@@ -220,60 +293,33 @@ class YouTubeCurator(BaseCurator):
         
         return selected_tracks[:target_size]
     
-    def _calculate_track_score(self, track: TrackInfo, history: Dict) -> float:
+    def _calculate_track_score(self, track: TrackInfo, history_index: UsageHistoryIndex, now: Optional[int] = None) -> float:
         """Calculate a score for track selection based on usage history."""
         base_score = 100.0
         
-        # Check usage history by BOTH ID and name/artist (YouTube IDs can be unreliable)
-        track_id = track.id
-        track_name_lower = track.name.lower().strip()
-        track_artist_lower = track.artist.lower().strip() if track.artist else ""
-        
         usage_penalty = 0
         recency_penalty = 0
         times_used = 0
         
         # Calculate penalties based on recent usage
-        current_date = datetime.now()
+        now = now or epoch_now()
         
-        for date_str, data in history.items():
-            try:
-                usage_date = datetime.strptime(date_str, '%Y-%m-%d')
-                days_ago = (current_date - usage_date).days
-                
-                # Check if this track was used (by ID OR by name+artist match)
-                used_tracks = data.get('tracks', [])
-                track_used = False
-                
-                for used_track in used_tracks:
-                    # Check by ID
-                    if used_track.get('id') == track_id:
-                        track_used = True
-                        break
-                    # Also check by name+artist (case insensitive)
-                    used_name = used_track.get('name', '').lower().strip()
-                    used_artist = used_track.get('artist', '').lower().strip()
-                    if track_name_lower and used_name and track_name_lower == used_name:
-                        if track_artist_lower == used_artist or not track_artist_lower or not used_artist:
-                            track_used = True
-                            break
-                
-                if track_used:
-                    times_used += 1
-                    # MASSIVE penalties for ANY recent use
-                    if days_ago == 0:  # Used TODAY
-                        recency_penalty += 1000  # Essentially block it
-                    elif days_ago < 7:  # Used within a week
-                        recency_penalty += 500
-                    elif days_ago < 30:  # Used within a month
-                        recency_penalty += 100
-                    else:  # Used more than a month ago
-                        recency_penalty += 25
-                    
-                    usage_penalty += 50 * times_used  # Multiply penalty by usage count
-                    
-            except ValueError:
-                continue  # Skip invalid date entries
+        # Dates this track was used (by ID OR by name+artist match)
+        for date_str in history_index.dates_used(track):
+            days_ago = (now - history_index.usage_dates[date_str]) // SECONDS_PER_DAY
+            
+            times_used += 1
+            # MASSIVE penalties for ANY recent use
+            if days_ago == 0:  # Used TODAY
+                recency_penalty += 1000  # Essentially block it
+            elif days_ago < 7:  # Used within a week
+                recency_penalty += 500
+            elif days_ago < 30:  # Used within a month
+                recency_penalty += 100
+            else:  # Used more than a month ago
+                recency_penalty += 25
+            
+            usage_penalty += 50 * times_used  # Multiply penalty by usage count
         
         # Apply penalties
         final_score = base_score - usage_penalty - recency_penalty
@@ -320,67 +366,49 @@ class YouTubeCurator(BaseCurator):
         return selected
     
     def _load_usage_history(self) -> Dict:
-        """Load usage history from file."""
+        """Load usage history from the snapshot and event log."""
         try:
-            if self.history_file.exists():
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
+            return self.history_log.load()
         except Exception as e:
             logger.warning(f"Could not load usage history: {e}")
         
         return {}
     
-    def _update_usage_history(self, selected_tracks: List[TrackInfo], history: Dict) -> None:
+    def _update_usage_history(self, selected_tracks: List[TrackInfo], history: Dict, playlist: str = None, now: Optional[int] = None) -> None:
         """Update usage history with selected tracks."""
         try:
-            today = datetime.now().strftime('%Y-%m-%d')
+            timestamp = now or epoch_now()
             
-            # Convert tracks to serializable format
-            track_data = []
-            for track in selected_tracks:
-                track_data.append({
-                    'id': track.id,
-                    'name': track.name,
-                    'artist': track.artist,
-                    'album': track.album,
-                    'uri': track.uri
-                })
-            
-            # Update history
-            history[today] = {
-                'tracks': track_data,
-                'track_count': len(selected_tracks),
-                'timestamp': datetime.now().isoformat()
-            }
+            # One event per selected track; they merge into today's entry by track ID
+            events = [
+                usage_event('youtube_music', playlist, timestamp, track.id,
+                            name=track.name, artist=track.artist, album=track.album, uri=track.uri)
+                for track in selected_tracks
+            ]
+            for event in events:
+                self.history_log.apply(history, event)
             
             # Keep only last 60 days of history
-            sorted_dates = sorted(history.keys(), reverse=True)
-            if len(sorted_dates) > 60:
-                for old_date in sorted_dates[60:]:
-                    del history[old_date]
+            self.history_log.prune(history, timestamp)
             
-            # Save to file
-            with open(self.history_file, 'w') as f:
-                json.dump(history, f, indent=2)
+            # Append to the event log instead of rewriting the file
+            self.history_log.append(events)
                 
-            logger.info(f"Updated usage history for {today}")
+            logger.info(f"Updated usage history for {datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')}")
             
         except Exception as e:
             logger.error(f"Failed to update usage history: {e}")
     
-    def _get_selection_stats(self, selected_tracks: List[TrackInfo], all_tracks: List[TrackInfo], history: Dict) -> Dict[str, Any]:
+    def _get_selection_stats(self, selected_tracks: List[TrackInfo], all_tracks: List[TrackInfo], history: Dict, history_index: Optional[UsageHistoryIndex] = None) -> Dict[str, Any]:
         """Get statistics about the selection process."""
         # Artist diversity
         selected_artists = [track.artist for track in selected_tracks if track.artist]
         artist_counts = Counter(selected_artists)
         
         # History stats
-        previously_used = 0
-        for track in selected_tracks:
-            for date_data in history.values():
-                if any(t.get('id') == track.id for t in date_data.get('tracks', [])):
-                    previously_used += 1
-                    break
+        if history_index is None:
+            history_index = UsageHistoryIndex.build(history)
+        previously_used = sum(1 for track in selected_tracks if history_index.by_id.get(track.id))
         
         return {
             'total_available': len(all_tracks),
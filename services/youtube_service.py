@@ -1,8 +1,9 @@
 """YouTube Music service implementation."""
 
+import asyncio
 import os
 import json
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator
 from pathlib import Path
 
 from ytmusicapi import YTMusic
@@ -16,6 +17,10 @@ from loguru import logger
 from base_music_service import BaseMusicService, MusicServiceType, TrackInfo, PlaylistInfo, ArtistInfo
 
 
+# Number of playlist tracks yielded at a time by iter_playlist_tracks
+PLAYLIST_PAGE_SIZE = 100
+
+
 class YouTubeMusicService(BaseMusicService):
     """YouTube Music implementation of the music service interface."""
     
@@ -218,35 +223,8 @@ class YouTubeMusicService(BaseMusicService):
         if not self.authenticated or not self.ytmusic:
             raise Exception("Not authenticated with YouTube Music")
         
-        tracks = []
         try:
-            # Get playlist details
-            playlist = self.ytmusic.get_playlist(playlist_id, limit=None)
-            
-            for track in playlist.get('tracks', []):
-                if track and track.get('videoId'):
-                    # Extract artist names
-                    artists = []
-                    if track.get('artists'):
-                        artists = [artist['name'] for artist in track['artists'] if artist.get('name')]
-                    
-                    # Extract album name
-                    album = 'Unknown'
-                    if track.get('album') and track['album'].get('name'):
-                        album = track['album']['name']
-                    
-                    track_info = TrackInfo(
-                        id=track['videoId'],
-                        name=track.get('title', 'Unknown'),
-                        artist=', '.join(artists) if artists else 'Unknown Artist',
-                        album=album,
-                        uri=f"https://music.youtube.com/watch?v={track['videoId']}",
-                        external_url=f"https://music.youtube.com/watch?v={track['videoId']}",
-                        duration_ms=self._parse_duration(track.get('duration', '0:00')) * 1000,
-                        explicit=False,  # YouTube Music doesn't expose explicit flag easily
-                        popularity=None  # Not available in YouTube Music API
-                    )
-                    tracks.append(track_info)
+            tracks = [track async for page in self.iter_playlist_tracks(playlist_id) for track in page]
             
             logger.info(f"Retrieved {len(tracks)} tracks from YouTube Music playlist {playlist_id}")
             return tracks
@@ -255,6 +233,50 @@ class YouTubeMusicService(BaseMusicService):
             logger.error(f"Failed to get playlist tracks: {e}")
             raise Exception(f"Could not retrieve playlist {playlist_id}: {str(e)}")
     
+    async def iter_playlist_tracks(self, playlist_id: str) -> AsyncIterator[List[TrackInfo]]:
+        """Yield the tracks of a YouTube Music playlist page by page.
+        
+        ytmusicapi only reads whole playlists, so the download runs once in a
+        worker thread (keeping the event loop free) and the items are then
+        converted and yielded PLAYLIST_PAGE_SIZE at a time.
+        """
+        if not self.authenticated or not self.ytmusic:
+            raise Exception("Not authenticated with YouTube Music")
+        
+        playlist = await asyncio.to_thread(self.ytmusic.get_playlist, playlist_id, limit=None)
+        items = playlist.get('tracks', [])
+        
+        for start in range(0, len(items), PLAYLIST_PAGE_SIZE):
+            yield [
+                self._track_from_playlist_item(track)
+                for track in items[start:start + PLAYLIST_PAGE_SIZE]
+                if track and track.get('videoId')
+            ]
+    
+    def _track_from_playlist_item(self, track: Dict[str, Any]) -> TrackInfo:
+        """Convert a ytmusicapi playlist item to TrackInfo."""
+        # Extract artist names
+        artists = []
+        if track.get('artists'):
+            artists = [artist['name'] for artist in track['artists'] if artist.get('name')]
+        
+        # Extract album name
+        album = 'Unknown'
+        if track.get('album') and track['album'].get('name'):
+            album = track['album']['name']
+        
+        return TrackInfo(
+            id=track['videoId'],
+            name=track.get('title', 'Unknown'),
+            artist=', '.join(artists) if artists else 'Unknown Artist',
+            album=album,
+            uri=f"https://music.youtube.com/watch?v={track['videoId']}",
+            external_url=f"https://music.youtube.com/watch?v={track['videoId']}",
+            duration_ms=self._parse_duration(track.get('duration', '0:00')) * 1000,
+            explicit=False,  # YouTube Music doesn't expose explicit flag easily
+            popularity=None  # Not available in YouTube Music API
+        )
+    
     def _parse_duration(self, duration_str: str) -> int:
         """Parse YouTube duration string to seconds."""
         try:
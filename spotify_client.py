@@ -2,15 +2,21 @@
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
+import numpy as np
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 from loguru import logger
 
+from audio_features_store import AudioFeaturesStore
 from config import Settings
 
+# Audio feature batches requested at once
+AUDIO_FEATURES_CONCURRENCY = 4
+
 
 class SpotifyClient:
     """Wrapper for Spotify API client with authentication."""
@@ -20,6 +26,7 @@ class SpotifyClient:
         self.settings = settings
         self.client: Optional[spotipy.Spotify] = None
         self._setup_client()
+        self.audio_features_store = AudioFeaturesStore(self.settings.data_dir / "audio_features.db")
     
     def _setup_client(self) -> None:
         """Set up Spotify client with OAuth authentication."""
@@ -74,14 +81,16 @@ class SpotifyClient:
             raise
     
     def get_audio_features(self, track_ids: List[str]) -> List[Dict[str, Any]]:
-        """Get audio features for multiple tracks."""
+        """Get audio features for multiple tracks.
+        
+        Features are immutable, so they are served from the local store and
+        only tracks never fetched before are requested from Spotify.
+        """
         try:
-            features = []
-            # Spotify API allows max 100 tracks per request
-            for i in range(0, len(track_ids), 100):
-                batch = track_ids[i:i+100]
-                batch_features = self.client.audio_features(batch)
-                features.extend([f for f in batch_features if f is not None])
+            self._fetch_missing_audio_features(track_ids)
+            
+            stored = self.audio_features_store.get_many(track_ids)
+            features = [stored[track_id] for track_id in dict.fromkeys(track_ids) if track_id in stored]
             
             logger.info(f"Retrieved audio features for {len(features)} tracks")
             return features
@@ -90,6 +99,26 @@ class SpotifyClient:
             logger.error(f"Failed to get audio features: {e}")
             raise
     
+    def get_audio_feature_matrix(self, track_ids: List[str], columns: List[str] = None) -> Tuple[List[str], np.ndarray]:
+        """Get audio features as a contiguous matrix, one row per track.
+        
+        Tracks without features are left out; the returned IDs give the row order.
+        """
+        self._fetch_missing_audio_features(track_ids)
+        return self.audio_features_store.as_array(track_ids, columns)
+    
+    def _fetch_missing_audio_features(self, track_ids: List[str]) -> None:
+        """Request features for tracks not yet in the store, in concurrent batches."""
+        batches = self.audio_features_store.missing_batches(track_ids)
+        if not batches:
+            return
+        
+        with ThreadPoolExecutor(max_workers=AUDIO_FEATURES_CONCURRENCY) as executor:
+            results = list(executor.map(self.client.audio_features, batches))
+        self.audio_features_store.put_batches(batches, results)
+        
+        logger.info(f"Fetched audio features for {sum(map(len, batches))} new tracks in {len(batches)} requests")
+    
     def get_recommendations(self, seed_tracks: List[str], target_features: Dict[str, float], limit: int = 50) -> List[Dict[str, Any]]:
         """Get track recommendations based on seed tracks and target audio features."""
         try:
@@ -0,0 +1,363 @@
+"""Append-only usage event logs with compaction into history snapshots."""
+
+import hashlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from loguru import logger
+
+from file_locking import atomic_write, file_lock
+
+# Fold the log into the snapshot once it grows past this size
+COMPACT_AFTER_BYTES = 1024 * 1024
+
+SECONDS_PER_DAY = 86400
+
+
+def to_epoch(value: Any) -> Optional[int]:
+    """Convert a history timestamp to integer epoch seconds.
+
+    Accepts the ISO strings older history files stored as well as numbers,
+    so it can be applied to values that were already migrated.
+
+    Raises:
+        ValueError: If a string is not an ISO timestamp
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def _migrate_timestamps(entry: Dict[str, Any], keys: tuple) -> int:
+    """Convert legacy ISO timestamps under `keys` in place (unparseable ones become None)."""
+    converted = 0
+    for key in keys:
+        if isinstance(entry.get(key), str):
+            try:
+                entry[key] = to_epoch(entry[key])
+            except ValueError:
+                entry[key] = None
+            converted += 1
+    return converted
+
+
+def epoch_now() -> int:
+    """Current time in integer epoch seconds (capture once per run)."""
+    return int(time.time())
+
+
+def usage_event(service: str, playlist: Optional[str], timestamp: int, track_id: str, **details: Any) -> Dict[str, Any]:
+    """Build one selection event.
+
+    Args:
+        service: Music service the track was selected on
+        playlist: Playlist the track was selected for
+        timestamp: Epoch seconds of the selection; shared by every event of a run
+        track_id: Selected track
+        **details: Track metadata the history format keeps (name, artist, ...)
+    """
+    return {'track_id': track_id, 'timestamp': timestamp, 'service': service, 'playlist': playlist, **details}
+
+
+class UsageEventLog(ABC):
+    """Usage history kept as a snapshot file plus a JSONL log of later selections.
+
+    Each run appends one line per selected track, so writes cost
+    O(selected tracks) and a crash can at worst tear the last line, which
+    is skipped on replay. Loading replays the log over the snapshot;
+    compaction writes the folded history back as the new snapshot and
+    empties the log.
+
+    Concurrent runs share the files safely: reads hold a shared lock and
+    appends and compactions an exclusive one on <history>.lock, and the
+    snapshot is only ever replaced atomically. Overlapping runs may append
+    their events out of timestamp order, so `apply` must not assume
+    ordering.
+
+    Compaction survives crashes without losing or repeating events: before
+    the snapshot is replaced, a marker records the new snapshot's hash and
+    how much of the log it contains. If the process dies before the log is
+    emptied, that prefix of the log is skipped on load and dropped by the
+    next writer.
+    """
+
+    def __init__(self, snapshot_path: Path, compact_after_bytes: int = COMPACT_AFTER_BYTES):
+        """Use the history snapshot at `snapshot_path` and its sibling .events.jsonl log."""
+        self.snapshot_path = Path(snapshot_path)
+        self.log_path = self.snapshot_path.with_suffix('.events.jsonl')
+        self.lock_path = self.snapshot_path.with_suffix('.lock')
+        self.marker_path = self.snapshot_path.with_suffix('.compaction.json')
+        self.compact_after_bytes = compact_after_bytes
+
+    @abstractmethod
+    def empty(self) -> Any:
+        """Create an empty history."""
+        pass
+
+    @abstractmethod
+    def apply(self, history: Any, event: Dict[str, Any]) -> None:
+        """Fold one selection event into the history."""
+        pass
+
+    def prune(self, history: Any, now: Optional[int] = None) -> None:
+        """Drop entries past the format's retention window (default: keep everything)."""
+        pass
+
+    def migrate(self, history: Any) -> int:
+        """Convert legacy ISO timestamps in a snapshot to epoch seconds, in place.
+
+        Returns:
+            Number of values converted
+        """
+        return 0
+
+    def _read_snapshot(self) -> Tuple[Any, Optional[bytes]]:
+        """Read the snapshot file.
+
+        Returns:
+            (history, raw bytes); an empty history and None if there is no snapshot
+        """
+        try:
+            if self.snapshot_path.exists():
+                raw = self.snapshot_path.read_bytes()
+                return json.loads(raw), raw
+        except Exception as e:
+            logger.warning(f"Could not load usage history snapshot {self.snapshot_path}: {e}")
+        return self.empty(), None
+
+    def _folded_log_bytes(self, raw_snapshot: Optional[bytes]) -> int:
+        """Length of the log prefix the snapshot already contains.
+
+        Only non-zero after a compaction was interrupted between replacing
+        the snapshot and emptying the log.
+        """
+        if raw_snapshot is None or not self.marker_path.exists():
+            return 0
+        try:
+            marker = json.loads(self.marker_path.read_text())
+        except (OSError, ValueError):
+            return 0
+        if marker.get('snapshot_sha256') != hashlib.sha256(raw_snapshot).hexdigest():
+            return 0  # The snapshot was never replaced
+        return marker.get('log_bytes', 0)
+
+    def events(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """Iterate over the logged events from byte offset `start`, skipping torn or corrupt lines."""
+        if not self.log_path.exists():
+            return
+
+        with open(self.log_path, 'rb') as f:
+            f.seek(start)
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                    event['timestamp'] = to_epoch(event['timestamp'])
+                    if event['timestamp'] is None:
+                        raise ValueError("missing timestamp")
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"Skipping unreadable usage event at {self.log_path}:{line_number}")
+                    continue
+                yield event
+
+    def _load_unlocked(self) -> Any:
+        """Load the history; the caller holds the lock."""
+        history, raw_snapshot = self._read_snapshot()
+        converted = self.migrate(history)
+        if converted:
+            logger.info(f"Converted {converted} legacy timestamps in {self.snapshot_path}; run 'python main.py migrate-history' to persist")
+        for event in self.events(self._folded_log_bytes(raw_snapshot)):
+            self.apply(history, event)
+        self.prune(history)
+        return history
+
+    def load(self) -> Any:
+        """Load the history: the snapshot with every logged event replayed."""
+        with file_lock(self.lock_path, shared=True):
+            return self._load_unlocked()
+
+    def _recover_unlocked(self) -> None:
+        """Finish an interrupted compaction before writing; the caller holds the exclusive lock."""
+        if not self.marker_path.exists():
+            return
+
+        folded = self._folded_log_bytes(self._read_snapshot()[1])
+        if folded and self.log_path.exists():
+            remaining = self.log_path.read_bytes()[folded:]
+            if remaining:
+                atomic_write(self.log_path, remaining)
+            else:
+                self.log_path.unlink()
+        self.marker_path.unlink()
+
+    def append(self, events: List[Dict[str, Any]]) -> None:
+        """Durably append events, compacting once the log grows too large."""
+        if not events:
+            return
+
+        lines = ''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in events)
+        with file_lock(self.lock_path):
+            self._recover_unlocked()
+
+            with open(self.log_path, 'a+b') as f:
+                # Terminate a line torn by an earlier crash so it cannot swallow this one
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        lines = '\n' + lines
+                f.write(lines.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+
+            if self.log_path.stat().st_size >= self.compact_after_bytes:
+                self._compact_unlocked()
+
+    def compact(self) -> Any:
+        """Fold the log into a new snapshot and empty the log.
+
+        Returns:
+            The compacted history
+        """
+        with file_lock(self.lock_path):
+            self._recover_unlocked()
+            return self._compact_unlocked()
+
+    def _compact_unlocked(self) -> Any:
+        """Compact; the caller holds the exclusive lock and has recovered."""
+        log_bytes = self.log_path.stat().st_size if self.log_path.exists() else 0
+        history = self._load_unlocked()
+        data = json.dumps(history, indent=2).encode('utf-8')
+
+        marker = {'snapshot_sha256': hashlib.sha256(data).hexdigest(), 'log_bytes': log_bytes}
+        atomic_write(self.marker_path, json.dumps(marker).encode('utf-8'))
+        atomic_write(self.snapshot_path, data)
+        if self.log_path.exists():
+            self.log_path.unlink()
+        self.marker_path.unlink()
+
+        logger.info(f"Compacted usage history into {self.snapshot_path}")
+        return history
+
+
+class SpotifyUsageEventLog(UsageEventLog):
+    """{track_id: {count, first_used, last_used, track_name, artist}} (spotify_usage_history.json)."""
+
+    def empty(self) -> Dict[str, Any]:
+        return {}
+
+    def apply(self, history: Dict[str, Any], event: Dict[str, Any]) -> None:
+        timestamp = event['timestamp']
+        entry = history.get(event['track_id'])
+
+        if entry is None:
+            history[event['track_id']] = {
+                'count': 1,
+                'first_used': timestamp,
+                'track_name': event.get('name'),
+                'artist': event.get('artist'),
+                'last_used': timestamp
+            }
+        else:
+            entry['count'] += 1
+            if not entry.get('last_used') or timestamp > entry['last_used']:
+                entry['last_used'] = timestamp
+
+    def migrate(self, history: Dict[str, Any]) -> int:
+        return sum(_migrate_timestamps(entry, ('first_used', 'last_used')) for entry in history.values())
+
+
+class YouTubeUsageEventLog(UsageEventLog):
+    """{date: {tracks, track_count, timestamp}} of the tracks used each day (youtube_usage_history.json).
+
+    Dates are local YYYY-MM-DD day buckets holding every track selected by
+    that day's runs; timestamp is the latest run's epoch seconds.
+    """
+
+    RETENTION_DAYS = 60
+
+    def empty(self) -> Dict[str, Any]:
+        return {}
+
+    def apply(self, history: Dict[str, Any], event: Dict[str, Any]) -> None:
+        timestamp = event['timestamp']
+        date = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+        day = history.setdefault(date, {'tracks': [], 'track_count': 0, 'timestamp': timestamp})
+
+        # Runs on the same day are merged by track ID, whatever order their events land in
+        day['timestamp'] = max(day.get('timestamp') or 0, timestamp)
+        if any(track.get('id') == event['track_id'] for track in day['tracks']):
+            return
+        day['tracks'].append({
+            'id': event['track_id'],
+            'name': event.get('name'),
+            'artist': event.get('artist'),
+            'album': event.get('album'),
+            'uri': event.get('uri')
+        })
+        day['track_count'] = len(day['tracks'])
+
+    def prune(self, history: Dict[str, Any], now: Optional[int] = None) -> None:
+        """Keep only the last 60 days of history."""
+        for old_date in sorted(history.keys(), reverse=True)[self.RETENTION_DAYS:]:
+            del history[old_date]
+
+    def migrate(self, history: Dict[str, Any]) -> int:
+        return sum(_migrate_timestamps(day, ('timestamp',)) for day in history.values())
+
+
+class EnhancedUsageEventLog(UsageEventLog):
+    """{tracks: {track_id: {...}}, playlists: [...], created_at} (playlist_history.json)."""
+
+    RETENTION_DAYS = 90
+
+    def empty(self) -> Dict[str, Any]:
+        return {
+            'tracks': {},  # track_id -> {count, last_used, first_used}
+            'playlists': [],  # list of playlist creation dates
+            'created_at': epoch_now()
+        }
+
+    def apply(self, history: Dict[str, Any], event: Dict[str, Any]) -> None:
+        timestamp = event['timestamp']
+        entry = history['tracks'].get(event['track_id'])
+
+        if entry is None:
+            history['tracks'][event['track_id']] = {
+                'count': 1,
+                'last_used': timestamp,
+                'first_used': timestamp,
+                'name': event.get('name'),
+                'artists': event.get('artists', [])
+            }
+        else:
+            entry['count'] += 1
+            if not entry.get('last_used') or timestamp > entry['last_used']:
+                entry['last_used'] = timestamp
+
+        # One playlist record per run
+        playlist = next((p for p in reversed(history['playlists']) if p['date'] == timestamp), None)
+        if playlist is None:
+            playlist = {'date': timestamp, 'track_count': 0, 'track_ids': []}
+            history['playlists'].append(playlist)
+        if event['track_id'] not in playlist['track_ids']:
+            playlist['track_ids'].append(event['track_id'])
+            playlist['track_count'] = len(playlist['track_ids'])
+
+    def prune(self, history: Dict[str, Any], now: Optional[int] = None) -> None:
+        """Keep playlist records from the last 90 days."""
+        cutoff = (now or epoch_now()) - self.RETENTION_DAYS * SECONDS_PER_DAY
+        history['playlists'] = [p for p in history['playlists'] if (p.get('date') or 0) > cutoff]
+
+    def migrate(self, history: Dict[str, Any]) -> int:
+        converted = sum(_migrate_timestamps(entry, ('first_used', 'last_used')) for entry in history['tracks'].values())
+        converted += sum(_migrate_timestamps(playlist, ('date',)) for playlist in history['playlists'])
+        return converted + _migrate_timestamps(history, ('created_at',))
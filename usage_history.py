@@ -0,0 +1,283 @@
+"""Storage backends for per-track curation usage history."""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional
+
+from loguru import logger
+
+from base_music_service import TrackInfo
+from usage_event_log import SpotifyUsageEventLog, usage_event, to_epoch
+
+# SQLite limit on host parameters in one statement is 999 on older builds
+_QUERY_CHUNK_SIZE = 900
+
+# Version 1 stores first_used/last_used as integer epoch seconds
+_SCHEMA_VERSION = 1
+
+# Seconds to wait for another process's write transaction to finish
+_BUSY_TIMEOUT = 30.0
+
+_CREATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS {table} ("
+    " track_id TEXT PRIMARY KEY,"
+    " count INTEGER NOT NULL,"
+    " first_used INTEGER,"
+    " last_used INTEGER,"
+    " track_name TEXT,"
+    " artist TEXT)"
+)
+
+
+class UsageHistoryStore(ABC):
+    """Per-track usage history: {track_id: {count, first_used, last_used, track_name, artist}}.
+
+    first_used and last_used are integer epoch seconds.
+    """
+
+    @abstractmethod
+    def load(self, track_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Load history entries.
+
+        Args:
+            track_ids: Only load these tracks (default: the whole history)
+
+        Returns:
+            Entries keyed by track ID; tracks never used are absent
+        """
+        pass
+
+    @abstractmethod
+    def record_usage(self, tracks: List[TrackInfo], used_at: int, playlist: Optional[str] = None) -> None:
+        """Count one more use of each track, at epoch second `used_at`, for `playlist`."""
+        pass
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+        pass
+
+
+class JsonUsageHistoryStore(UsageHistoryStore):
+    """The original JSON history file, updated through an append-only event log.
+
+    Selections are appended to spotify_usage_history.events.jsonl and
+    folded into the JSON snapshot on compaction. The history is read once
+    and then served from memory.
+    """
+
+    def __init__(self, path: Path):
+        """Use the JSON history file at `path`."""
+        self.path = Path(path)
+        self.event_log = SpotifyUsageEventLog(self.path)
+        self._history: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def load(self, track_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Load history entries from the snapshot and event log."""
+        if self._history is None:
+            self._history = self.event_log.load()
+        history = self._history
+
+        if track_ids is None:
+            return {track_id: dict(entry) for track_id, entry in history.items()}
+        return {track_id: dict(history[track_id]) for track_id in track_ids if track_id in history}
+
+    def record_usage(self, tracks: List[TrackInfo], used_at: int, playlist: Optional[str] = None) -> None:
+        """Append one usage event per selected track."""
+        events = [
+            usage_event('spotify', playlist, used_at, track.id, name=track.name, artist=track.artist)
+            for track in tracks
+        ]
+        self.event_log.append(events)
+        if self._history is not None:
+            for event in events:
+                self.event_log.apply(self._history, event)
+
+    def compact(self) -> None:
+        """Fold the event log into the JSON file."""
+        self.event_log.compact()
+
+
+class SqliteUsageHistoryStore(UsageHistoryStore):
+    """History in an embedded SQLite database, indexed on track_id and last_used.
+
+    Reads fetch only the requested tracks and writes upsert only the
+    selected ones, so load and save times stay flat as history grows.
+    Writes are IMMEDIATE transactions, so concurrent curation runs queue
+    up behind each other instead of overwriting each other's updates.
+    """
+
+    def __init__(self, path: Path):
+        """Open (or create) the history database."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=_BUSY_TIMEOUT, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+        # Create or upgrade the schema while holding the write lock, so
+        # processes opening the database at once do it only once
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'usage_history'"
+            ).fetchone() is not None
+            if exists and version < _SCHEMA_VERSION:
+                self._migrate_to_epoch()
+            else:
+                self._conn.execute(_CREATE_TABLE.format(table='usage_history'))
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_usage_history_last_used ON usage_history (last_used)")
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _migrate_to_epoch(self) -> None:
+        """Rebuild a version 0 table (ISO text timestamps) with integer epoch timestamps.
+
+        Runs inside the caller's transaction. The table is recreated
+        because TEXT columns would store the converted integers as text
+        again.
+        """
+        rows = []
+        for track_id, count, first_used, last_used, track_name, artist in self._conn.execute(
+            "SELECT track_id, count, first_used, last_used, track_name, artist FROM usage_history"
+        ):
+            try:
+                first_used, last_used = to_epoch(first_used), to_epoch(last_used)
+            except ValueError:
+                first_used = last_used = None
+            rows.append((track_id, count, first_used, last_used, track_name, artist))
+
+        self._conn.execute(_CREATE_TABLE.format(table='usage_history_epoch'))
+        self._conn.executemany("INSERT INTO usage_history_epoch VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self._conn.execute("DROP TABLE usage_history")
+        self._conn.execute("ALTER TABLE usage_history_epoch RENAME TO usage_history")
+        logger.info(f"Converted {len(rows)} usage history rows in {self.path} to epoch timestamps")
+
+    @staticmethod
+    def _entry(row: tuple) -> Dict[str, Any]:
+        """Convert a (track_id, count, first_used, last_used, track_name, artist) row to an entry."""
+        entry = {'count': row[1], 'first_used': row[2], 'track_name': row[4], 'artist': row[5]}
+        if row[3] is not None:
+            entry['last_used'] = row[3]
+        return entry
+
+    def load(self, track_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Load history entries, by primary key lookup when track_ids are given."""
+        query = "SELECT track_id, count, first_used, last_used, track_name, artist FROM usage_history"
+        history = {}
+
+        with self._lock:
+            if track_ids is None:
+                for row in self._conn.execute(query):
+                    history[row[0]] = self._entry(row)
+                return history
+
+            unique_ids = list(dict.fromkeys(track_ids))
+            for start in range(0, len(unique_ids), _QUERY_CHUNK_SIZE):
+                chunk = unique_ids[start:start + _QUERY_CHUNK_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+                for row in self._conn.execute(f"{query} WHERE track_id IN ({placeholders})", chunk):
+                    history[row[0]] = self._entry(row)
+
+        return history
+
+    def record_usage(self, tracks: List[TrackInfo], used_at: int, playlist: Optional[str] = None) -> None:
+        """Upsert one use of each selected track in a single transaction.
+
+        Counts are incremented in SQL and last_used only moves forward, so
+        overlapping runs both count regardless of which commits first.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO usage_history (track_id, count, first_used, last_used, track_name, artist)"
+                    " VALUES (?, 1, ?, ?, ?, ?)"
+                    " ON CONFLICT (track_id) DO UPDATE SET count = count + 1,"
+                    " last_used = MAX(COALESCE(last_used, excluded.last_used), excluded.last_used)",
+                    [(track.id, used_at, used_at, track.name, track.artist) for track in tracks]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def is_empty(self) -> bool:
+        """Whether no usage has been recorded yet."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM usage_history LIMIT 1").fetchone() is None
+
+    def import_json(self, json_path: Path, if_empty: bool = False) -> int:
+        """Import a JSON history file (as written by JsonUsageHistoryStore).
+
+        Entries replace any existing rows for the same tracks.
+
+        Args:
+            json_path: JSON history file (its event log is replayed too)
+            if_empty: Only import into an empty database, checked in the
+                import transaction so concurrent first runs import once
+
+        Returns:
+            Number of entries imported
+        """
+        history = JsonUsageHistoryStore(json_path).load()
+        rows = [
+            (track_id, entry.get('count', 0), entry.get('first_used'), entry.get('last_used'),
+             entry.get('track_name'), entry.get('artist'))
+            for track_id, entry in history.items()
+        ]
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if if_empty and self._conn.execute("SELECT 1 FROM usage_history LIMIT 1").fetchone() is not None:
+                    self._conn.execute("ROLLBACK")
+                    return 0
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO usage_history (track_id, count, first_used, last_used, track_name, artist)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        logger.info(f"Imported {len(rows)} usage history entries from {json_path}")
+        return len(rows)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def create_usage_history_store(backend: str, base_path: Path) -> UsageHistoryStore:
+    """Create a history store.
+
+    Args:
+        backend: 'sqlite' or 'json'
+        base_path: History file path without suffix (e.g. ./spotify_usage_history)
+
+    The SQLite store imports an existing JSON history (snapshot and event
+    log) the first time it is created next to one.
+    """
+    json_path = base_path.with_suffix('.json')
+
+    if backend == 'json':
+        return JsonUsageHistoryStore(json_path)
+    if backend != 'sqlite':
+        raise ValueError(f"Unknown usage history backend: {backend}")
+
+    store = SqliteUsageHistoryStore(base_path.with_suffix('.db'))
+    if store.is_empty() and (json_path.exists() or json_path.with_suffix('.events.jsonl').exists()):
+        store.import_json(json_path, if_empty=True)
+    return store